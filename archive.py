@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from fetcher import get_json
+from openmeteo import ARCHIVE_URL
+from timeseries import Series
+
+# -----------------------
+# Historical archive
+# -----------------------
+# Daily history from the Open-Meteo archive API, kept on local disk as
+# Parquet partitioned by location and year:
+#
+#     <ARCHIVE_DIR>/location=48.857_2.352/year=1994/data.parquet
+#
+# Past years never change, so each one is fetched once (several years per
+# request) and afterwards read straight from disk, only the columns asked
+# for, memory-mapped. pyarrow is imported on first use: most sessions
+# never open the climate trend, and it adds a noticeable share of a cold
+# worker's import time.
+
+ARCHIVE_DIR = os.environ.get("CLIMATESIGHT_ARCHIVE_DIR", ".cache/archive")
+VARIABLES = ("temperature_2m_mean", "temperature_2m_max",
+             "temperature_2m_min", "precipitation_sum")
+START_YEAR = 1980
+CHUNK_YEARS = 10
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def last_full_year():
+    return time.gmtime().tm_year - 1
+
+
+def _location_dir(lat, lon, root):
+    return os.path.join(root, f"location={lat:.3f}_{lon:.3f}")
+
+
+def _year_path(lat, lon, year, root):
+    return os.path.join(_location_dir(lat, lon, root), f"year={year}", "data.parquet")
+
+
+def _location_lock(lat, lon):
+    key = (round(lat, 3), round(lon, 3))
+    with _locks_lock:
+        if key not in _locks:
+            _locks[key] = threading.Lock()
+        return _locks[key]
+
+
+def _write_year(path, days, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.table({"time": days.astype("datetime64[D]"),
+                      **{name: col.astype(np.float32) for name, col in columns.items()}})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+def _fetch_chunk(lat, lon, first, last, root):
+    # One request for years first..last, split into yearly partitions.
+    resp = get_json(
+        ARCHIVE_URL,
+        params={"latitude": lat, "longitude": lon,
+                "start_date": f"{first}-01-01", "end_date": f"{last}-12-31",
+                "daily": ",".join(VARIABLES), "timezone": "auto"},
+        timeout=30)
+    daily = Series.from_block(resp.get("daily"), "D")
+    years = daily.time.astype("datetime64[Y]").astype(int) + 1970
+    for year in range(first, last + 1):
+        rows = np.nonzero(years == year)[0]
+        if len(rows) == 0:
+            continue
+        part = daily.slice(rows[0], rows[-1] + 1)
+        _write_year(_year_path(lat, lon, year, root), part.time,
+                    {name: part[name].astype(float) if name in part
+                     else np.full(len(part), np.nan) for name in VARIABLES})
+
+
+def sync(lat, lon, first=START_YEAR, last=None, root=None):
+    # Make sure years first..last are on disk, fetching missing runs of
+    # years CHUNK_YEARS at a time. Returns the number of requests made.
+    root = root or ARCHIVE_DIR
+    last = last or last_full_year()
+    with _location_lock(lat, lon):
+        missing = [y for y in range(first, last + 1)
+                   if not os.path.exists(_year_path(lat, lon, y, root))]
+        chunks = []
+        for year in missing:
+            if chunks and year == chunks[-1][1] + 1 and year - chunks[-1][0] < CHUNK_YEARS:
+                chunks[-1][1] = year
+            else:
+                chunks.append([year, year])
+        for a, b in chunks:
+            _fetch_chunk(lat, lon, a, b, root)
+        return len(chunks)
+
+
+def load(lat, lon, columns=VARIABLES, first=START_YEAR, last=None, root=None):
+    # Daily Series for years first..last from whatever is on disk, reading
+    # only `columns`.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    root = root or ARCHIVE_DIR
+    last = last or last_full_year()
+    paths = [_year_path(lat, lon, y, root) for y in range(first, last + 1)]
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        return Series([], {name: np.empty(0) for name in columns}, "D")
+    table = pa.concat_tables(
+        [pq.read_table(p, columns=["time", *columns], memory_map=True) for p in paths])
+    return Series(table.column("time").to_numpy(),
+                  {name: table.column(name).to_numpy() for name in columns}, "D")
+
+
+def yearly(series, name, how="mean"):
+    # (years, per-year mean or sum of `name`), ignoring missing days.
+    years = series.time.astype("datetime64[Y]").astype(int) + 1970
+    if len(years) == 0:
+        return np.empty(0, dtype=int), np.empty(0)
+    starts = np.concatenate([[0], np.nonzero(np.diff(years))[0] + 1])
+    values = np.asarray(series[name], dtype=float)
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    if how == "sum":
+        return years[starts], sums
+    counts = np.add.reduceat(valid.astype(int), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return years[starts], sums / counts
+
+
+def trend(years, values):
+    # Least-squares slope per decade, or None with fewer than two years.
+    ok = ~np.isnan(values)
+    if ok.sum() < 2:
+        return None
+    return float(np.polyfit(years[ok], values[ok], 1)[0] * 10)
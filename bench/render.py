@@ -0,0 +1,251 @@
+"""End-to-end render benchmark for app.py.
+
+Runs the app headlessly through Streamlit's AppTest against the local
+Open-Meteo stand-in (standin.py) and reports, per scenario and per
+cold/warm cache state: wall time, time spent in each pipeline stage,
+chart payload bytes and peak Python memory. Results are written to
+bench/results/render-<commit>.json so two commits can be diffed:
+
+    python bench/render.py
+    python bench/render.py --scenarios world india cities-5000 --latency 0.1
+    python bench/render.py --compare bench/results/render-abc123.json bench/results/render-def456.json
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+sys.path.insert(0, ROOT)
+
+# scenario name -> (sidebar mode, size of generated city catalogue)
+SCENARIOS = {
+    "world": ("World", 0),
+    "india": ("India (states)", 0),
+    "wind-field": ("Wind field", 0),
+    "cities-50": ("Cities", 50),
+    "cities-500": ("Cities", 500),
+    "cities-5000": ("Cities", 5000),
+}
+
+# (module, attribute, stage); nested stages are reported separately, e.g.
+# "geometry" and "frames" are both part of "build_globe".
+STAGES = [
+    ("openmeteo", "collect_current", "collect"),
+    ("openmeteo", "collect_conditions", "collect"),
+    ("windfield", "fetch_wind_field", "wind_field"),
+    ("openmeteo", "get_forecast", "details_fetch"),
+    ("openmeteo", "get_air", "details_fetch"),
+    ("globe", "build_globe", "build_globe"),
+    ("globe", "arrow_frames", "geometry"),
+    ("globe", "arrow_traces", "frames"),
+    ("plotly.io", "to_json", "serialize"),
+    ("details", "plot_temp48", "plot_temp48"),
+    ("details", "plot_hourly", "plot_hourly"),
+    ("details", "summarize_weather", "summarize_weather"),
+    ("snapshot", "build", "snapshot_build"),
+]
+
+
+class StageTimer:
+    def __init__(self):
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def install(self):
+        import importlib
+        for module_name, attr, stage in STAGES:
+            module = importlib.import_module(module_name)
+            setattr(module, attr, self._wrap(getattr(module, attr), stage))
+
+    def _wrap(self, fn, stage):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.times[stage] += time.perf_counter() - t0
+                self.calls[stage] += 1
+        return timed
+
+    def reset(self):
+        self.times.clear()
+        self.calls.clear()
+
+
+def write_cities(path, n, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["name", "latitude", "longitude", "population"])
+        for i in range(n):
+            w.writerow([f"City {i:05d}", round(rng.uniform(-60, 70), 4),
+                        round(rng.uniform(-180, 180), 4), rng.randint(1000, 10**6)])
+
+
+def reset_caches():
+    import globe
+    import openmeteo
+    import snapshot
+    import store
+    openmeteo.cache.clear()
+    store.store.clear()
+    globe.clear_figures()
+    snapshot.reset()
+
+
+def run_app(mode, timer, measure_memory=False):
+    from streamlit.testing.v1 import AppTest
+    # AppTest's bare-mode context warnings would drown the report
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+    at.session_state["mode"] = mode
+    timer.reset()
+    if measure_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    at.run()
+    total = time.perf_counter() - t0
+    peak = None
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].message}")
+    specs = [len(c.proto.spec) for c in at.get("plotly_chart")]
+    # with browser-side animation the globe is an iframe, drawn first
+    iframes = [len(c.proto.srcdoc) for c in at.get("iframe")]
+    return {
+        "total_s": round(total, 4),
+        "stages_s": {k: round(v, 4) for k, v in sorted(timer.times.items())},
+        "calls": dict(sorted(timer.calls.items())),
+        "payload_bytes": sum(specs) + sum(iframes),
+        "globe_bytes": (iframes or specs or [0])[0],
+        "peak_mem_bytes": peak,
+    }
+
+
+def commit_id():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                      cwd=ROOT, text=True).strip()
+        dirty = subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                        cwd=ROOT, text=True).strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    tmp = tempfile.mkdtemp(prefix="climatesight-bench-")
+    # must be set before the app modules are imported
+    os.environ["CLIMATESIGHT_STORE_PATH"] = os.path.join(tmp, "store.sqlite3")
+    # background refreshes would hit the stand-in between measured runs
+    os.environ["CLIMATESIGHT_PREFETCH"] = "0"
+    from standin import serve
+    server, url = serve(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    os.environ["CLIMATESIGHT_API_BASE"] = url
+    if args.max_points is not None:
+        os.environ["CLIMATESIGHT_MAX_POINTS"] = str(args.max_points)
+
+    import catalogue
+    timer = StageTimer()
+    timer.install()
+
+    results = {}
+    for name in args.scenarios:
+        mode, n_cities = SCENARIOS[name]
+        if n_cities:
+            path = os.path.join(tmp, f"cities-{n_cities}.csv")
+            write_cities(path, n_cities)
+            os.environ["CLIMATESIGHT_CITIES"] = path
+        else:
+            os.environ.pop("CLIMATESIGHT_CITIES", None)
+        catalogue.get_catalogue.cache_clear()
+
+        reset_caches()
+        results[f"{name}/cold"] = run_app(mode, timer)
+        results[f"{name}/warm"] = run_app(mode, timer)
+        if args.memory:
+            reset_caches()
+            results[f"{name}/cold"]["peak_mem_bytes"] = run_app(mode, timer, True)["peak_mem_bytes"]
+            results[f"{name}/warm"]["peak_mem_bytes"] = run_app(mode, timer, True)["peak_mem_bytes"]
+        for state in ("cold", "warm"):
+            r = results[f"{name}/{state}"]
+            print(f"{name:>12} {state}: {r['total_s'] * 1000:8.1f} ms  "
+                  f"globe {r['globe_bytes'] / 1024:8.1f} KiB  "
+                  + "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in r["stages_s"].items()))
+    server.shutdown()
+
+    out = {
+        "commit": commit_id(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "settings": {"latency": args.latency, "jitter": args.jitter,
+                     "error_rate": args.error_rate, "max_points": args.max_points},
+        "results": results,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"render-{out['commit']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"wrote {path}")
+
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}")
+
+    def row(label, a, b, scale=1000.0, unit="ms"):
+        if a is None or b is None:
+            return
+        change = (b - a) / a * 100 if a else 0.0
+        print(f"  {label:<20} {a * scale:10.1f} {b * scale:10.1f} {unit:<4} {change:+7.1f}%")
+
+    for key in sorted(set(old["results"]) & set(new["results"])):
+        a, b = old["results"][key], new["results"][key]
+        print(key)
+        row("total", a["total_s"], b["total_s"])
+        for stage in sorted(set(a["stages_s"]) | set(b["stages_s"])):
+            row(stage, a["stages_s"].get(stage, 0.0), b["stages_s"].get(stage, 0.0))
+        row("globe payload", a["globe_bytes"], b["globe_bytes"], 1 / 1024, "KiB")
+        row("peak memory", a["peak_mem_bytes"], b["peak_mem_bytes"], 1 / 2**20, "MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS),
+                        default=["world", "india", "cities-50", "cities-500", "cities-5000"])
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="stand-in latency per upstream request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-points", type=int,
+                        help="override CLIMATESIGHT_MAX_POINTS for the run")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the tracemalloc passes")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="diff two result files instead of running")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Startup benchmark: time to first render in a fresh worker process.
+
+Each measurement runs in a new Python process against the local
+Open-Meteo stand-in (standin.py), the way a worker starts after a
+scale-out, and reports interpreter-plus-import time, the first
+render's wall time and a rerun for reference. The "cold" scenario
+starts with an empty store and no compiled location tables; "warmed"
+runs warmup.py in its own process first, as a deployment entry point
+would. Results are written to bench/results/startup-<commit>.json:
+
+    python bench/startup.py
+    python bench/startup.py --latency 0.2 --repeat 5
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from render import RESULTS_DIR, ROOT, commit_id
+
+SCENARIOS = ("cold", "warmed")
+
+# Runs in the child: everything from here on is what a new worker pays.
+CHILD = r"""
+import json, logging, os, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, os.environ["CLIMATESIGHT_ROOT"])
+import streamlit
+from streamlit.testing.v1 import AppTest
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+t1 = time.perf_counter()
+at = AppTest.from_file(os.path.join(os.environ["CLIMATESIGHT_ROOT"], "app.py"), default_timeout=300)
+at.run()
+t2 = time.perf_counter()
+if at.exception:
+    raise SystemExit(f"app raised: {at.exception[0].message}")
+at.run()
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "first_render_s": t2 - t1,
+    "rerun_s": t3 - t2,
+    "modules": len(sys.modules),
+    "loaded": sorted(m for m in ("pandas", "pyarrow") if m in sys.modules),
+}))
+"""
+
+
+def _env(tmp, url):
+    env = dict(os.environ,
+               CLIMATESIGHT_ROOT=ROOT,
+               CLIMATESIGHT_API_BASE=url,
+               CLIMATESIGHT_STORE_PATH=os.path.join(tmp, "store.sqlite3"),
+               CLIMATESIGHT_CATALOGUE_CACHE=os.path.join(tmp, "catalogue"),
+               CLIMATESIGHT_PREFETCH="0")
+    env.pop("CLIMATESIGHT_SNAPSHOT_URL", None)
+    return env
+
+
+def run_once(scenario, url):
+    tmp = tempfile.mkdtemp(prefix="climatesight-startup-")
+    try:
+        env = _env(tmp, url)
+        warmup_s = None
+        if scenario == "warmed":
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(ROOT, "warmup.py")],
+                           env=env, cwd=tmp, check=True, stdout=subprocess.DEVNULL)
+            warmup_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", CHILD], env=env, cwd=tmp, check=True,
+                             capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        # interpreter start-up included: what the first viewer waits for
+        result["process_s"] = time.perf_counter() - t0 - result["rerun_s"]
+        result["warmup_s"] = warmup_s
+        return result
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def summarize(runs):
+    out = {}
+    for key in ("import_s", "first_render_s", "rerun_s", "process_s", "warmup_s"):
+        values = [r[key] for r in runs if r[key] is not None]
+        out[key] = round(statistics.median(values), 4) if values else None
+    out["modules"] = runs[-1]["modules"]
+    out["loaded"] = runs[-1]["loaded"]
+    return out
+
+
+def run(args):
+    sys.path.insert(0, ROOT)
+    from standin import serve
+    server, url = serve(latency=args.latency, jitter=args.jitter)
+
+    results = {}
+    for scenario in args.scenarios:
+        r = results[scenario] = summarize([run_once(scenario, url) for _ in range(args.repeat)])
+        warm = f"  (warm-up {r['warmup_s'] * 1000:.0f} ms)" if r["warmup_s"] else ""
+        print(f"{scenario:>8}: first render {r['process_s'] * 1000:8.1f} ms  "
+              f"imports {r['import_s'] * 1000:7.1f} ms  "
+              f"render {r['first_render_s'] * 1000:7.1f} ms  "
+              f"rerun {r['rerun_s'] * 1000:7.1f} ms{warm}")
+    server.shutdown()
+
+    out = {
+        "commit": commit_id(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "settings": {"latency": args.latency, "jitter": args.jitter, "repeat": args.repeat},
+        "results": results,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"startup-{out['commit']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"wrote {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="stand-in latency per upstream request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="fresh processes per scenario; the median is reported")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
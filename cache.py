@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# -----------------------
+# Process-wide response cache
+# -----------------------
+# Streamlit re-executes app.py for every session and interaction, but
+# imported modules live for the whole server process, so anything held
+# here is shared by all viewers.
+
+MISSING = object()
+
+
+class Expiring:
+    # Returned from fetch_many to give one value its own TTL, e.g. a stale
+    # value served while a refresh is in flight.
+    def __init__(self, value, ttl):
+        self.value = value
+        self.ttl = ttl
+
+
+class _Pending:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = MISSING
+        self.error = None
+
+
+class TTLCache:
+    # Bounded LRU cache with per-type expiry and in-flight coalescing.
+    # The type of a key is the prefix before the first ":" ("T", "W", ...),
+    # which picks its TTL from `ttls`.
+
+    def __init__(self, maxsize=4096, ttls=None, default_ttl=900, name="cache"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, key):
+        return self.ttls.get(key.split(":", 1)[0], self.default_ttl)
+
+    def _lookup(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+        value, expires = entry
+        if expires <= now:
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _store(self, key, value, now, ttl=None):
+        if isinstance(value, Expiring):
+            value, ttl = value.value, value.ttl
+        if ttl is None:
+            ttl = self.ttl_for(key)
+        self._data[key] = (value, now + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            return self._lookup(key, time.time())
+
+    def put(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, time.time(), ttl)
+
+    def expires_at(self, key):
+        # Expiry time of the entry for `key` (possibly already past), or
+        # None when it is not cached. Does not touch the LRU order.
+        with self._lock:
+            entry = self._data.get(key)
+        return None if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_many_or_fetch(self, keys, fetch_many):
+        # Return {key: value} for `keys`. Keys that are neither cached nor
+        # already being fetched are passed to fetch_many(keys) -> {key: value}
+        # in one call; keys another thread is fetching are waited on instead
+        # of being requested a second time.
+        result, owned, waiting = {}, {}, {}
+        with self._lock:
+            now = time.time()
+            for key in keys:
+                if key in result or key in owned or key in waiting:
+                    continue
+                value = self._lookup(key, now)
+                if value is not MISSING:
+                    result[key] = value
+                elif key in self._pending:
+                    waiting[key] = self._pending[key]
+                else:
+                    owned[key] = self._pending[key] = _Pending()
+        if metrics.ENABLED:
+            for result_name, n in (("hit", len(result)), ("miss", len(owned)),
+                                   ("coalesced", len(waiting))):
+                if n:
+                    metrics.inc("climatesight_cache_requests_total", n,
+                                cache=self.name, result=result_name)
+
+        if owned:
+            try:
+                fetched = fetch_many(list(owned))
+                error = None
+            except Exception as exc:
+                fetched, error = {}, exc
+            with self._lock:
+                now = time.time()
+                for key, pending in owned.items():
+                    if key in fetched:
+                        value = fetched[key]
+                        if isinstance(value, Expiring):
+                            value = value.value
+                        self._store(key, fetched[key], now)
+                        pending.value = value
+                    pending.error = error
+                    del self._pending[key]
+                    pending.event.set()
+            if error is not None:
+                raise error
+            for key, pending in owned.items():
+                if pending.value is not MISSING:
+                    result[key] = pending.value
+
+        for key, pending in waiting.items():
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            if pending.value is not MISSING:
+                result[key] = pending.value
+        return result
+
+    def get_or_fetch(self, key, fetch):
+        return self.get_many_or_fetch([key], lambda keys: {key: fetch()}).get(key)
@@ -0,0 +1,237 @@
+import csv
+import math
+import os
+import threading
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from geometry import unit_vectors
+
+# -----------------------
+# Location catalogue
+# -----------------------
+# Locations are held column-wise: one NumPy array per field instead of a
+# dict per place, so tens of thousands of cities stay a few MB and can be
+# filtered with array operations.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LOCATIONS_CSV = os.path.join(DATA_DIR, "locations.csv")
+# parsed tables are kept here as .npz so later processes skip the parsing
+COMPILED_DIR = os.environ.get("CLIMATESIGHT_CATALOGUE_CACHE", ".cache/catalogue")
+
+
+def _angular_distance(xyz, lat, lon):
+    # Great-circle angle (radians) from each row of xyz to (lat, lon).
+    dots = xyz @ unit_vectors(lat, lon)
+    return np.arccos(np.clip(dots, -1.0, 1.0))
+
+
+class GridIndex:
+    # Fixed lat/lon grid stored CSR-style: point indices sorted by cell,
+    # plus the offset of each cell's run. Queries look at the cells that
+    # can intersect the search cap, then test only their points exactly.
+
+    def __init__(self, lat, lon, cell_deg=5.0):
+        self.cell_deg = cell_deg
+        self.n_rows = int(math.ceil(180 / cell_deg))
+        self.n_cols = int(math.ceil(360 / cell_deg))
+        self.xyz = unit_vectors(lat, lon)
+
+        rows = np.clip(((np.asarray(lat) + 90) // cell_deg).astype(int), 0, self.n_rows - 1)
+        cols = np.clip(((np.asarray(lon) + 180) // cell_deg).astype(int), 0, self.n_cols - 1)
+        cells = rows * self.n_cols + cols
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.n_rows * self.n_cols)
+        self.starts = np.concatenate([[0], np.cumsum(counts)])
+
+        # cell centres, with one cell width as a safe bound on the
+        # centre-to-corner angle
+        r, c = np.divmod(np.arange(self.n_rows * self.n_cols), self.n_cols)
+        self.cell_xyz = unit_vectors(-90 + (r + 0.5) * cell_deg,
+                                      -180 + (c + 0.5) * cell_deg)
+        self.cell_radius = math.radians(cell_deg)
+        self.occupied = counts > 0
+
+    def _cells_near(self, lat, lon, radius):
+        dist = _angular_distance(self.cell_xyz, lat, lon)
+        return np.nonzero(self.occupied & (dist <= radius + self.cell_radius))[0]
+
+    def within(self, lat, lon, radius):
+        # Indices of points within `radius` radians of (lat, lon).
+        cells = self._cells_near(lat, lon, radius)
+        if len(cells) == 0:
+            return np.empty(0, dtype=int)
+        candidates = np.concatenate(
+            [self.order[self.starts[c]:self.starts[c + 1]] for c in cells])
+        dist = _angular_distance(self.xyz[candidates], lat, lon)
+        return candidates[dist <= radius]
+
+    def nearest(self, lat, lon, n):
+        # Indices of the n points closest to (lat, lon), closest first.
+        n = min(n, len(self.order))
+        if n == 0:
+            return np.empty(0, dtype=int)
+        radius = math.radians(self.cell_deg)
+        while True:
+            found = self.within(lat, lon, radius)
+            if len(found) >= n or radius >= math.pi:
+                break
+            radius *= 2
+        dist = _angular_distance(self.xyz[found], lat, lon)
+        return found[np.argsort(dist, kind="stable")[:n]]
+
+
+class Catalogue:
+    def __init__(self, names, lat, lon, groups, population=None):
+        self.names = np.asarray(names, dtype=object)
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.groups = np.asarray(groups, dtype=object)
+        if population is None:
+            population = np.zeros(len(self.names), dtype=np.int64)
+        self.population = np.asarray(population, dtype=np.int64)
+        self._index = None
+        self._groups = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = GridIndex(self.lat, self.lon)
+        return self._index
+
+    def take(self, idx):
+        return Catalogue(self.names[idx], self.lat[idx], self.lon[idx],
+                         self.groups[idx], self.population[idx])
+
+    def group(self, name):
+        # memoized so each group builds its spatial index once
+        if name not in self._groups:
+            self._groups[name] = self.take(np.nonzero(self.groups == name)[0])
+        return self._groups[name]
+
+    def visible(self, lat, lon, radius_deg=90.0):
+        # Points on the orthographic hemisphere centred on (lat, lon), or
+        # within a smaller viewport radius when zoomed in.
+        return self.index.within(lat, lon, math.radians(radius_deg))
+
+    def nearest(self, lat, lon, n):
+        return self.index.nearest(lat, lon, n)
+
+    def in_view(self, lat, lon, limit, radius_deg=90.0):
+        # The `limit` visible points closest to the view centre.
+        idx = self.visible(lat, lon, radius_deg)
+        dist = _angular_distance(self.index.xyz[idx], lat, lon)
+        return idx[np.argsort(dist, kind="stable")[:limit]]
+
+# -----------------------
+# Loaders
+# -----------------------
+def load_csv(path=LOCATIONS_CSV, group=None):
+    # GeoNames-style CSV with a header: name, latitude, longitude and
+    # optional group / population columns.
+    names, lat, lon, groups, pop = [], [], [], [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            names.append(row["name"])
+            lat.append(float(row["latitude"]))
+            lon.append(float(row["longitude"]))
+            groups.append(row.get("group") or group)
+            pop.append(int(row.get("population") or 0))
+    return Catalogue(names, lat, lon, groups, pop)
+
+
+def load_geonames(path, group="cities"):
+    # Tab-separated GeoNames dump (cities500.txt, cities15000.txt, ...):
+    # name is column 1, latitude/longitude columns 4/5, population 14.
+    names, lat, lon, pop = [], [], [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15:
+                continue
+            names.append(f"{cols[1]}, {cols[8]}")
+            lat.append(float(cols[4]))
+            lon.append(float(cols[5]))
+            pop.append(int(cols[14] or 0))
+    return Catalogue(names, lat, lon, [group] * len(names), pop)
+
+
+# -----------------------
+# Compiled tables
+# -----------------------
+# A source file is parsed once; its columns are then written as an
+# uncompressed .npz (fixed-width strings, no pickles) tagged with the
+# source's size and mtime, and loaded from there while those still match.
+
+def compiled_path(path, root=None):
+    path = os.path.abspath(path)
+    tag = f"{zlib.crc32(path.encode()):08x}"
+    return os.path.join(root or COMPILED_DIR, f"{os.path.basename(path)}-{tag}.npz")
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def _load_compiled(path, stamp):
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            if not np.array_equal(z["stamp"], stamp):
+                return None
+            return Catalogue(z["names"].astype(object), z["lat"], z["lon"],
+                             z["groups"].astype(object), z["population"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_compiled(cat, path, stamp):
+    # best effort: an unwritable cache directory only costs the parse
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp, stamp=stamp, names=cat.names.astype(str), lat=cat.lat, lon=cat.lon,
+                 groups=cat.groups.astype(str), population=cat.population)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def load_table(path, parse, root=None):
+    # parse(path) -> Catalogue, skipped when a current compiled copy exists
+    stamp = _source_stamp(path)
+    target = compiled_path(path, root)
+    cat = _load_compiled(target, stamp)
+    if cat is None:
+        cat = parse(path)
+        _write_compiled(cat, target, stamp)
+    return cat
+
+
+def load_catalogue(extra_path=None):
+    # The bundled countries/states table, plus an optional larger city
+    # file (GeoNames .txt dump or CSV) added as the "cities" group.
+    cat = load_table(LOCATIONS_CSV, load_csv)
+    if not extra_path:
+        return cat
+    if extra_path.endswith(".txt"):
+        extra = load_table(extra_path, load_geonames)
+    else:
+        extra = load_table(extra_path, lambda p: load_csv(p, group="cities"))
+    return Catalogue(np.concatenate([cat.names, extra.names]),
+                     np.concatenate([cat.lat, extra.lat]),
+                     np.concatenate([cat.lon, extra.lon]),
+                     np.concatenate([cat.groups, extra.groups]),
+                     np.concatenate([cat.population, extra.population]))
+
+
+@lru_cache(maxsize=1)
+def get_catalogue():
+    # Process-wide catalogue; CLIMATESIGHT_CITIES points at an optional
+    # city file to load alongside the bundled table.
+    return load_catalogue(os.environ.get("CLIMATESIGHT_CITIES"))
@@ -0,0 +1,147 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from downsample import lttb
+
+# -----------------------
+# Hourly charts
+# -----------------------
+# Series are downsampled to about one point per pixel of chart width, so
+# the payload stays bounded however long the series gets. Markers are
+# only drawn while they can be told apart.
+CHART_WIDTH_PX = 800
+MARKER_LIMIT = 100
+
+HOURLY_SERIES = {
+    "Temperature (°C)": ("forecast", "temperature_2m"),
+    "Humidity (%)": ("forecast", "relativehumidity_2m"),
+    "Wind speed": ("forecast", "windspeed_10m"),
+    "US AQI": ("air", "us_aqi"),
+    "PM2.5": ("air", "pm2_5"),
+}
+
+
+def line_trace(x, y, max_points=CHART_WIDTH_PX, **kwargs):
+    x, y = lttb(x, y, max_points)
+    style = dict(mode="lines+markers" if len(y) <= MARKER_LIMIT else "lines",
+                 line=dict(width=3), marker=dict(size=6))
+    style.update(kwargs)
+    return go.Scatter(x=x, y=y, **style)
+
+
+def plot_hourly(data, name, hours=None):
+    # `name` from a Forecast's hourly block, whole or for the next `hours`
+    # from the location's current hour, with a line at its current time.
+    try:
+        hourly = data.hourly if hours is None else data.next_hours(hours)
+        times = hourly.time
+        now = data.local_now()
+
+        fig = go.Figure(line_trace(times, hourly[name]))
+
+        if times[0] <= now <= times[-1]:
+            xloc = now
+        else:
+            xloc = times[0]
+
+        fig.add_vline(x=xloc, line_width=3, line_dash="dash",
+                      line_color="#ff4d4d", opacity=0.9)
+
+        fig.update_layout(height=360, margin=dict(l=20, r=20, t=20, b=20))
+        return fig
+    except:
+        return go.Figure()
+
+# -----------------------
+# 48-hour plot
+# -----------------------
+def plot_temp48(forecast):
+    return plot_hourly(forecast, "temperature_2m", 48)
+
+# -----------------------
+# Climate trend plot
+# -----------------------
+def plot_trend(years, temp, precip, slope=None):
+    try:
+        fig = go.Figure()
+        fig.add_bar(x=years, y=precip, name="Precipitation (mm)",
+                    marker_color="#3b82f6", opacity=0.35, yaxis="y2")
+        fig.add_trace(line_trace(years, temp, name="Mean temperature (°C)",
+                                 line=dict(width=3, color="#ff8c00")))
+        if slope is not None:
+            fit = temp[~np.isnan(temp)].mean() + slope / 10 * (years - years.mean())
+            fig.add_scatter(x=years, y=fit, name=f"Trend ({slope:+.2f} °C/decade)",
+                            mode="lines", line=dict(dash="dash", color="#ff4d4d"))
+        fig.update_layout(height=360, margin=dict(l=20, r=20, t=20, b=20),
+                          yaxis=dict(title="°C"),
+                          yaxis2=dict(title="mm", overlaying="y", side="right", showgrid=False),
+                          legend=dict(orientation="h", y=1.12))
+        return fig
+    except:
+        return go.Figure()
+
+# ------------------------------------------------------
+# NEW FEATURE — AI-STYLE WEATHER SUMMARY (2–3 SENTENCES)
+# ------------------------------------------------------
+def summarize_weather(temp, hum, wind, aqi):
+    sentences = []
+
+    # Temperature interpretation
+    if temp is not None:
+        try:
+            tval = float(temp)
+        except:
+            tval = None
+        if tval is not None:
+            if tval < 10:
+                sentences.append(f"The temperature is quite cold at around {tval}°C, so conditions may feel chilly.")
+            elif tval < 20:
+                sentences.append(f"The temperature is mild at about {tval}°C, comfortable for most outdoor activities.")
+            elif tval < 30:
+                sentences.append(f"The temperature is warm at roughly {tval}°C.")
+            else:
+                sentences.append(f"It's quite hot right now at around {tval}°C, which may feel uncomfortable outdoors.")
+
+    # Humidity interpretation
+    if hum is not None:
+        try:
+            hval = float(hum)
+        except:
+            hval = None
+        if hval is not None:
+            if hval > 70:
+                sentences.append("Humidity is high, which can make the weather feel heavier and more uncomfortable.")
+            elif hval > 40:
+                sentences.append("Humidity levels are moderate and generally comfortable.")
+            else:
+                sentences.append("Humidity is low, so the air may feel dry.")
+
+    # Wind interpretation
+    if wind is not None:
+        try:
+            wval = float(wind)
+        except:
+            wval = None
+        if wval is not None:
+            if wval < 3:
+                sentences.append("Winds are very light, keeping conditions calm.")
+            elif wval < 7:
+                sentences.append("There's a gentle to moderate breeze.")
+            else:
+                sentences.append("Winds are strong, which may affect outdoor comfort.")
+
+    # AQI interpretation
+    if aqi is not None:
+        try:
+            aval = float(aqi)
+        except:
+            aval = None
+        if aval is not None:
+            if aval <= 50:
+                sentences.append("Air quality is excellent, making outdoor activities completely safe.")
+            elif aval <= 100:
+                sentences.append("Air quality is acceptable for most people.")
+            else:
+                sentences.append("Air quality is poor, so sensitive groups should limit outdoor exposure.")
+
+    return " ".join(sentences[:3])  # only 2–3 sentences
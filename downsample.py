@@ -0,0 +1,53 @@
+import numpy as np
+
+# -----------------------
+# Chart downsampling
+# -----------------------
+# Long series are thinned on the server before they go into a Plotly
+# figure, so the payload and the browser's drawing time are bounded by
+# the chart's width in pixels rather than by the series length. LTTB
+# keeps the first and last points and the visible shape: peaks and
+# troughs survive, flat stretches do not cost points.
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[s]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def _finite(x, y):
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    ok = np.isfinite(y)
+    if ok.all():
+        return x, y
+    return x[ok], y[ok]
+
+
+def lttb(x, y, n):
+    # Largest-Triangle-Three-Buckets: split the inner points into n - 2
+    # buckets and keep from each the point forming the largest triangle
+    # with the previously kept point and the mean of the next bucket.
+    # Missing (NaN) points are dropped first.
+    x, y = _finite(x, y)
+    size = len(y)
+    if n >= size or n < 3:
+        return x, y
+    xf = _as_float(x)
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    keep = np.empty(n, dtype=int)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i == n - 3:
+            cx, cy = xf[-1], y[-1]
+        else:
+            cx, cy = xf[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        area = np.abs((xf[a] - cx) * (y[lo:hi] - y[a]) -
+                      (xf[a] - xf[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
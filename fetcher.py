@@ -0,0 +1,303 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# -----------------------
+# Settings
+# -----------------------
+MAX_WORKERS = int(os.environ.get("CLIMATESIGHT_MAX_WORKERS", "8"))
+RENDER_DEADLINE = float(os.environ.get("CLIMATESIGHT_RENDER_DEADLINE", "4.0"))
+INTERACTIVE_WORKERS = int(os.environ.get("CLIMATESIGHT_INTERACTIVE_WORKERS", "4"))
+
+# Per-endpoint upstream budget (requests/s and burst). The last
+# INTERACTIVE_RESERVE tokens are kept for the interactive lane.
+UPSTREAM_RATE = float(os.environ.get("CLIMATESIGHT_UPSTREAM_RATE", "10"))
+UPSTREAM_BURST = int(os.environ.get("CLIMATESIGHT_UPSTREAM_BURST", "20"))
+INTERACTIVE_RESERVE = 2
+
+RETRIES = int(os.environ.get("CLIMATESIGHT_RETRIES", "2"))
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+
+# After BREAKER_THRESHOLD transient failures in a row an endpoint fails
+# fast for BREAKER_COOLDOWN seconds, then lets one probe request through.
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# -----------------------
+# Pooled keep-alive sessions
+# -----------------------
+# requests.Session is not guaranteed to be thread-safe, so each thread gets
+# its own. The pool threads are long-lived, so their connections to
+# Open-Meteo stay open between renders.
+_local = threading.local()
+
+
+def session():
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        _local.session = s
+    return s
+
+
+# -----------------------
+# Request scheduling
+# -----------------------
+# Every upstream call goes through a token bucket and a circuit breaker
+# for its endpoint. Calls are tagged with a lane: "interactive" for what
+# the user is looking at (the selected location's details) and
+# "background" for globe points, revalidation and prefetching. Background
+# calls yield to waiting interactive ones and never spend the reserve.
+def set_lane(lane):
+    _local.lane = lane
+
+
+def current_lane():
+    # Script threads are interactive; pool threads set their own lane.
+    return getattr(_local, "lane", "interactive")
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, reserve=0):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.interactive_waiting = 0
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        # Non-blocking: spend a token if one is available.
+        with self._cond:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def acquire(self, interactive, timeout):
+        # Wait up to `timeout` seconds for a token.
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if interactive:
+                self.interactive_waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    floor = 1 if interactive else 1 + self.reserve
+                    if self.tokens >= floor and (interactive or not self.interactive_waiting):
+                        self.tokens -= 1
+                        return True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = max((floor - self.tokens) / self.rate, 0.01) if self.rate else remaining
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                if interactive:
+                    self.interactive_waiting -= 1
+                    self._cond.notify_all()
+
+
+class CircuitBreaker:
+    # State is exported as climatesight_breaker_open{endpoint=name}.
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+        metrics.set_gauge("climatesight_breaker_open", 0, endpoint=name)
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.probing = True
+            return True
+
+    def release(self):
+        # the allowed call never reached upstream
+        with self._lock:
+            self.probing = False
+
+    def success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                metrics.set_gauge("climatesight_breaker_open", 0, endpoint=self.name)
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                metrics.set_gauge("climatesight_breaker_open", 1, endpoint=self.name)
+
+
+class _Endpoint:
+    def __init__(self, path):
+        self.bucket = TokenBucket(UPSTREAM_RATE, UPSTREAM_BURST, INTERACTIVE_RESERVE)
+        self.breaker = CircuitBreaker(path)
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def _endpoint(path):
+    with _endpoints_lock:
+        if path not in _endpoints:
+            _endpoints[path] = _Endpoint(path)
+        return _endpoints[path]
+
+
+class CircuitOpen(requests.RequestException):
+    pass
+
+
+class Throttled(requests.RequestException):
+    pass
+
+
+def _request(url, params, timeout, endpoint):
+    # One HTTP attempt.
+    if not metrics.ENABLED:
+        resp = session().get(url, params=params, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    outcome = "error"
+    t0 = time.perf_counter()
+    try:
+        resp = session().get(url, params=params, timeout=timeout)
+        if resp.status_code >= 400:
+            outcome = f"http_{resp.status_code}"
+        resp.raise_for_status()
+        data = resp.json()
+        outcome = "ok"
+        return data
+    except requests.Timeout:
+        outcome = "timeout"
+        raise
+    finally:
+        metrics.observe("climatesight_upstream_seconds", time.perf_counter() - t0,
+                        endpoint=endpoint)
+        metrics.inc("climatesight_upstream_requests_total",
+                    endpoint=endpoint, outcome=outcome)
+
+
+def _transient(exc):
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def _backoff(attempt, exc):
+    # Full jitter, but honour a short Retry-After from a 429.
+    retry_after = None
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        retry_after = exc.response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit() and int(retry_after) <= BACKOFF_CAP:
+        return float(retry_after)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def get_json(url, params, timeout, retries=None):
+    # Rate-limited, retried and circuit-broken GET. Raises a
+    # requests.RequestException subclass on failure, like requests itself.
+    endpoint = urlparse(url).path
+    limiter = _endpoint(endpoint)
+    lane = current_lane()
+    if retries is None:
+        retries = RETRIES
+    for attempt in range(retries + 1):
+        if not limiter.breaker.allow():
+            metrics.inc("climatesight_upstream_requests_total",
+                        endpoint=endpoint, outcome="circuit_open")
+            raise CircuitOpen(f"{endpoint} is failing, not calling it for now")
+        if not limiter.bucket.acquire(lane == "interactive", timeout):
+            limiter.breaker.release()
+            metrics.inc("climatesight_upstream_requests_total",
+                        endpoint=endpoint, outcome="throttled")
+            raise Throttled(f"{endpoint} rate limit: no slot within {timeout}s")
+        try:
+            data = _request(url, params, timeout, endpoint)
+        except requests.RequestException as exc:
+            if not _transient(exc):
+                # upstream answered, so it is healthy; the request is not
+                limiter.breaker.success()
+                raise
+            limiter.breaker.failure()
+            if attempt == retries:
+                raise
+            metrics.inc("climatesight_upstream_retries_total", endpoint=endpoint)
+            time.sleep(_backoff(attempt, exc))
+            continue
+        except ValueError:
+            limiter.breaker.success()
+            raise
+        limiter.breaker.success()
+        return data
+
+# -----------------------
+# Concurrent fetch engine
+# -----------------------
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS,
+                              thread_name_prefix="climatesight-fetch",
+                              initializer=set_lane, initargs=("background",))
+# small separate pool so the selected location's details never queue
+# behind a globe's worth of chunks
+interactive_executor = ThreadPoolExecutor(max_workers=INTERACTIVE_WORKERS,
+                                          thread_name_prefix="climatesight-interactive",
+                                          initializer=set_lane, initargs=("interactive",))
+
+
+def run_all(tasks, deadline=None, lane="background"):
+    # Run {name: callable} on the lane's pool and return {name: result} for
+    # the tasks that finished within `deadline` seconds. Late background
+    # tasks keep running and fill the cache for the next render instead of
+    # holding this one up. Late interactive tasks that have not started are
+    # cancelled, so an abandoned selection does not hold the small pool.
+    if deadline is None:
+        deadline = RENDER_DEADLINE
+    pool = interactive_executor if lane == "interactive" else executor
+    futures = {pool.submit(fn): name for name, fn in tasks.items()}
+    done, late = wait(futures, timeout=deadline)
+    if lane == "interactive":
+        for fut in late:
+            fut.cancel()
+    out = {}
+    for fut in done:
+        try:
+            out[futures[fut]] = fut.result()
+        except Exception:
+            pass
+    return out
@@ -0,0 +1,78 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# -----------------------
+# Great-circle helpers
+# -----------------------
+def destination_points(lat, lon, bearing_deg, distance_km):
+    # Point reached from (lat, lon) along an initial bearing after
+    # distance_km on the great circle; arguments broadcast together.
+    br = np.radians(bearing_deg)
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    d = np.asarray(distance_km, dtype=float) / EARTH_RADIUS_KM
+    sin_lat1, cos_lat1 = np.sin(lat1), np.cos(lat1)
+    sin_d, cos_d = np.sin(d), np.cos(d)
+    sin_lat2 = sin_lat1 * cos_d + cos_lat1 * sin_d * np.cos(br)
+    lat2 = np.arcsin(np.clip(sin_lat2, -1.0, 1.0))
+    lon2 = lon1 + np.arctan2(np.sin(br) * sin_d * cos_lat1,
+                             cos_d - sin_lat1 * sin_lat2)
+    return np.degrees(lat2), (np.degrees(lon2) + 540) % 360 - 180
+
+
+def unit_vectors(lat, lon):
+    # Points on the unit sphere, shape (..., 3).
+    la, lo = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(la) * np.cos(lo),
+                     np.cos(la) * np.sin(lo),
+                     np.sin(la)], axis=-1)
+
+
+def tangent_basis(lat, lon):
+    # Local east and north unit vectors at each point, shape (..., 3).
+    la, lo = np.radians(lat), np.radians(lon)
+    east = np.stack([-np.sin(lo), np.cos(lo), np.zeros_like(lo)], axis=-1)
+    north = np.stack([-np.sin(la) * np.cos(lo),
+                      -np.sin(la) * np.sin(lo),
+                      np.cos(la)], axis=-1)
+    return east, north
+
+# -----------------------
+# Wind-arrow geometry
+# -----------------------
+def arrow_frames(lats, lons, bearings, n_frames, osc, main_km, head_km):
+    # Shaft tips and both head barbs for every arrow in every animation
+    # frame, in one batched pass. Each returned array has shape
+    # (n_frames, n_arrows); arrow idx in frame i points along
+    # bearings[idx] + osc * sin(2*pi*i/n_frames + idx*0.3).
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    bearings = np.asarray(bearings, dtype=float)
+    phase = 2 * np.pi * np.arange(n_frames) / n_frames
+    idx = np.arange(len(bearings))
+    bearing = bearings[None, :] + osc * np.sin(phase[:, None] + idx[None, :] * 0.3)
+
+    tip_lat, tip_lon = destination_points(lats[None, :], lons[None, :], bearing, main_km)
+    left_lat, left_lon = destination_points(tip_lat, tip_lon, bearing + 150, head_km)
+    right_lat, right_lon = destination_points(tip_lat, tip_lon, bearing - 150, head_km)
+    return {"tip": (tip_lat, tip_lon),
+            "left": (left_lat, left_lon),
+            "right": (right_lat, right_lon)}
+
+
+def arrow_paths(lats, lons, tip, left, right):
+    # Pack arrows into one polyline per coordinate: shaft base -> tip, a
+    # gap, then left barb -> tip -> right barb, and another gap. Inputs are
+    # 1-D arrays for a single frame; gaps are None, as Plotly expects.
+    n = len(lats)
+    lat = np.empty((n, 7), dtype=object)
+    lon = np.empty((n, 7), dtype=object)
+    lat[:, 0], lon[:, 0] = lats, lons
+    lat[:, 1], lon[:, 1] = tip
+    lat[:, 3], lon[:, 3] = left
+    lat[:, 4], lon[:, 4] = tip
+    lat[:, 5], lon[:, 5] = right
+    lat[:, [2, 6]] = None
+    lon[:, [2, 6]] = None
+    return lat.ravel().tolist(), lon.ravel().tolist()
@@ -0,0 +1,235 @@
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import metrics
+from geometry import arrow_frames, arrow_paths
+
+# -----------------------
+# Wind colours
+# -----------------------
+# Lower edges (m/s) of the bins shown in the sidebar wind-speed legend.
+WIND_BINS = [0, 1, 3, 6, 10, 12]
+WIND_BIN_TOP = 15.0
+
+
+def speed_to_color(speed, vmax=15.0):
+    if speed is None:
+        return "rgb(180,180,180)"
+    s = max(0.0, min(float(speed), vmax))
+    frac = s / vmax
+    if frac <= 0.33:
+        t = frac / 0.33
+        r, g, b = 0, int(255 * t), int(200 + t * 55)
+    elif frac <= 0.66:
+        t = (frac - 0.33) / 0.33
+        r, g, b = int(255 * t), 255, int(255 * (1 - t))
+    else:
+        t = (frac - 0.66) / 0.34
+        r, g, b = 255, int(255 * (1 - t)), 0
+    return f"rgb({r},{g},{b})"
+
+
+def binned_color(speed):
+    # speed_to_color at the middle of the legend bin holding `speed`, so
+    # arrows share a handful of colours and can be drawn as one trace each.
+    if speed is None:
+        return speed_to_color(None)
+    s = float(speed)
+    edges = WIND_BINS + [WIND_BIN_TOP]
+    for lo, hi in zip(edges, edges[1:]):
+        if s < hi:
+            return speed_to_color((lo + hi) / 2)
+    return speed_to_color((edges[-2] + edges[-1]) / 2)
+
+# -----------------------
+# Wind arrows
+# -----------------------
+def arrow_groups(wind_points):
+    # {colour: [index into wind_points]}, in first-seen order so trace
+    # order is stable across frames.
+    groups = {}
+    for idx, p in enumerate(wind_points):
+        groups.setdefault(p["color"], []).append(idx)
+    return groups
+
+
+def arrow_traces(wind_points, geom, frame, groups):
+    # One line trace per colour holding every arrow of that colour in
+    # `frame`, with None separators between the pieces.
+    traces = []
+    for color, idxs in groups.items():
+        lat, lon = arrow_paths(
+            [wind_points[i]["lat"] for i in idxs],
+            [wind_points[i]["lon"] for i in idxs],
+            tuple(a[frame, idxs] for a in geom["tip"]),
+            tuple(a[frame, idxs] for a in geom["left"]),
+            tuple(a[frame, idxs] for a in geom["right"]))
+        traces.append(go.Scattergeo(lat=lat, lon=lon, mode="lines",
+                                    line=dict(width=4, color=color),
+                                    hoverinfo="skip"))
+    return traces
+
+# -----------------------
+# Globe figure
+# -----------------------
+N = 20
+OSC = 12
+MAIN = 500
+HEAD = 150
+PERIOD_S = 1.6  # one oscillation: N frames at 80 ms
+
+# "browser" ships each arrow once and animates it client-side (see
+# wind_component.py); "frames" precomputes N Plotly animation frames.
+ANIMATION = os.environ.get("CLIMATESIGHT_ANIMATION", "browser")
+
+
+def arrow_spec(points, wind_points=None):
+    # What the browser needs to animate the arrows itself: base position,
+    # bearing and speed of each arrow, its colour group (the trace index
+    # after the markers), and the oscillation parameters.
+    if wind_points is None:
+        wind_points = [p for p in points if p["wd"] is not None]
+    groups = arrow_groups(wind_points)
+    group_of = {}
+    for g, idxs in enumerate(groups.values()):
+        for i in idxs:
+            group_of[i] = g
+    return {
+        "lat": [round(p["lat"], 4) for p in wind_points],
+        "lon": [round(p["lon"], 4) for p in wind_points],
+        "bearing": [round(float(p["wd"]), 1) for p in wind_points],
+        "speed": [None if p["ws"] is None else round(float(p["ws"]), 1) for p in wind_points],
+        "group": [group_of[i] for i in range(len(wind_points))],
+        "colors": list(groups),
+        "osc": OSC, "main_km": MAIN, "head_km": HEAD, "period_s": PERIOD_S,
+    }
+
+
+def build_globe(points, wind_points=None, frames=True):
+    # The full globe (markers, arrow frames, layout) as a plain figure
+    # dict. Arrows default to every point with a wind direction. The
+    # projection rotation is filled in per view by globe_figure. Without
+    # `frames` the arrow traces are left empty for the browser to fill.
+    if wind_points is None:
+        wind_points = [p for p in points if p["wd"] is not None]
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scattergeo(
+        lat=[p["lat"] for p in points],
+        lon=[p["lon"] for p in points],
+        text=[f"{p['name']} — {p['temp']}°C" for p in points],
+        mode="markers+text",
+        marker=dict(size=9, color="crimson"),
+        textfont=dict(size=18, color="white"),
+        textposition="top center"
+    ))
+
+    # placeholders for wind arrows, one trace per colour bin
+    groups = arrow_groups(wind_points)
+    for color in groups:
+        fig.add_trace(go.Scattergeo(lat=[None], lon=[None], mode="lines", line=dict(width=4, color=color)))
+
+    if frames:
+        # all shafts and heads for all frames in one batched pass
+        geom = arrow_frames([p["lat"] for p in wind_points],
+                            [p["lon"] for p in wind_points],
+                            [float(p["wd"]) for p in wind_points],
+                            N, OSC, MAIN, HEAD)
+
+        fig_frames = []
+        for i in range(N):
+            fdata = [fig.data[0]] + arrow_traces(wind_points, geom, i, groups)
+            fig_frames.append(go.Frame(name=f"f{i}", data=fdata))
+
+        fig.frames = fig_frames
+
+    # layout with blue ocean
+    fig.update_layout(
+        geo=dict(
+            showcountries=True,
+            showland=True,
+            showocean=True,
+            landcolor="rgba(211, 211, 211, 1)",
+            oceancolor="rgba(179, 229, 252, 0.8)",
+            coastlinecolor="rgba(100,100,100,0.6)",
+            showcoastlines=True,
+            projection_type="orthographic"
+        ),
+        margin=dict(l=0, r=0, t=10, b=0),
+        showlegend=False,
+        height=720,
+    )
+    if frames:
+        fig.update_layout(updatemenus=[{
+            "type": "buttons",
+            "showactive": False,
+            "x": 0.06, "y": 0.06,
+            "buttons": [
+                {"label": "Play", "method": "animate",
+                 "args": [None, {"frame": {"duration": 80, "redraw": True}, "fromcurrent": True}]},
+                {"label": "Pause", "method": "animate",
+                 "args": [[None], {"frame": {"duration": 0, "redraw": False}}]}
+            ]
+        }])
+    return fig.to_dict()
+
+# -----------------------
+# Figure cache
+# -----------------------
+# Built figures keyed on (mode, data snapshot). A rerun that only changes
+# the selected location reuses the cached spec and swaps in the rotation.
+FIGURE_CACHE_SIZE = 8
+_figures = OrderedDict()
+_figures_lock = threading.Lock()
+
+
+class PrebuiltFigure(go.Figure):
+    # A figure backed by an already validated spec. st.plotly_chart reads
+    # figures through to_dict(), which would otherwise deep-copy every
+    # frame on each rerun.
+    def __init__(self, spec):
+        super().__init__()
+        self._spec = spec
+
+    def to_dict(self):
+        return self._spec
+
+
+def clear_figures():
+    with _figures_lock:
+        _figures.clear()
+
+
+def snapshot_key(mode, points, wind_points=None):
+    key = (mode, tuple((p["name"], p["lat"], p["lon"], p["temp"], p["ws"], p["wd"])
+                       for p in points))
+    if wind_points is not None:
+        key += (tuple((p["lat"], p["lon"], p["ws"], p["wd"]) for p in wind_points),)
+    return key
+
+
+def globe_figure(mode, points, rotation, wind_points=None, frames=True):
+    key = snapshot_key(mode, points, wind_points) + (frames,)
+    with _figures_lock:
+        spec = _figures.get(key)
+        if spec is not None:
+            _figures.move_to_end(key)
+    if spec is None:
+        with metrics.stage("build_globe"):
+            spec = build_globe(points, wind_points, frames)
+        if metrics.ENABLED:
+            metrics.set_gauge("climatesight_figure_bytes", len(pio.to_json(spec)), mode=mode)
+        with _figures_lock:
+            _figures[key] = spec
+            while len(_figures) > FIGURE_CACHE_SIZE:
+                _figures.popitem(last=False)
+
+    # shallow copies down to the rotation so the cached spec stays untouched
+    geo = dict(spec["layout"]["geo"])
+    geo["projection"] = dict(geo.get("projection", {}), rotation=rotation)
+    return PrebuiltFigure(dict(spec, layout=dict(spec["layout"], geo=geo)))
@@ -0,0 +1,212 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -----------------------
+# Settings
+# -----------------------
+# Off unless CLIMATESIGHT_METRICS is set. When off, timed() returns the
+# function unchanged and stage() a shared no-op context, so the hot path
+# pays one attribute check at most.
+ENABLED = os.environ.get("CLIMATESIGHT_METRICS", "") not in ("", "0")
+# loopback only unless CLIMATESIGHT_METRICS_HOST says otherwise
+METRICS_HOST = os.environ.get("CLIMATESIGHT_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("CLIMATESIGHT_METRICS_PORT", "9464"))
+LOG_INTERVAL = float(os.environ.get("CLIMATESIGHT_METRICS_LOG", "0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "climatesight_cache_requests_total": "Cache lookups by cache and result (hit, miss, coalesced).",
+    "climatesight_store_requests_total": "Persistent store lookups by result (fresh, stale, miss).",
+    "climatesight_upstream_requests_total": "Upstream HTTP requests by endpoint and outcome.",
+    "climatesight_upstream_retries_total": "Upstream requests retried after a transient error, by endpoint.",
+    "climatesight_upstream_seconds": "Upstream HTTP latency by endpoint.",
+    "climatesight_helper_seconds": "Time spent in API helpers, including cache work.",
+    "climatesight_stage_seconds": "Time spent in each render stage.",
+    "climatesight_prefetch_requests_total": "Background refresh requests by kind and outcome.",
+    "climatesight_snapshot_builds_total": "Globe snapshot builds, by whether every location had data.",
+    "climatesight_snapshot_requests_total": "Snapshot endpoint responses by status.",
+    "climatesight_breaker_open": "1 while an endpoint's circuit breaker is open, else 0.",
+    "climatesight_figure_bytes": "Serialized size of the last built globe figure, by mode.",
+}
+
+log = logging.getLogger("climatesight.metrics")
+
+# -----------------------
+# Registry
+# -----------------------
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_gauges = {}      # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[(name, _labels(labels))] = value
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        h[bisect_left(LATENCY_BUCKETS, value)] += 1
+        h[-1] += value
+
+
+@contextmanager
+def _stage(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("climatesight_stage_seconds", time.perf_counter() - t0, stage=name)
+
+
+def stage(name):
+    # with metrics.stage("collect"): ...
+    if not ENABLED:
+        return nullcontext()
+    return _stage(name)
+
+
+def timed(helper):
+    # Decorator recording climatesight_helper_seconds{helper=...}.
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+
+        def timed_fn(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe("climatesight_helper_seconds", time.perf_counter() - t0,
+                        helper=helper)
+        timed_fn.__name__ = fn.__name__
+        timed_fn.__doc__ = fn.__doc__
+        return timed_fn
+    return wrap
+
+# -----------------------
+# Export
+# -----------------------
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    lines, seen = [], set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, "counter")
+        lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        header(name, "gauge")
+        lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    for (name, labels), h in sorted(histograms.items()):
+        header(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), h[:-1]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-1]:.6f}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    # Flat summary for the sidebar debug panel: counters and gauges as
+    # values, histograms as (count, mean seconds).
+    with _lock:
+        out = {}
+        for (name, labels), value in _counters.items():
+            out[name + _fmt_labels(labels)] = value
+        for (name, labels), value in _gauges.items():
+            out[name + _fmt_labels(labels)] = value
+        for (name, labels), h in _histograms.items():
+            count = sum(h[:-1])
+            out[name + _fmt_labels(labels)] = (count, h[-1] / count if count else 0.0)
+    return dict(sorted(out.items()))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _log_loop():
+    while True:
+        time.sleep(LOG_INTERVAL)
+        for key, value in snapshot().items():
+            log.info("%s %s", key, value)
+
+
+_started = False
+
+
+def start():
+    # Serve /metrics on CLIMATESIGHT_METRICS_HOST:PORT and, when
+    # CLIMATESIGHT_METRICS_LOG is set, log a snapshot every that many
+    # seconds. Safe to call on every rerun; only the first call does work.
+    global _started
+    with _lock:
+        if not ENABLED or _started:
+            return
+        _started = True
+    try:
+        server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True,
+                         name="climatesight-metrics").start()
+    except OSError as exc:
+        log.warning("metrics endpoint not started on %s:%s: %s", METRICS_HOST, METRICS_PORT, exc)
+    if LOG_INTERVAL > 0:
+        threading.Thread(target=_log_loop, daemon=True, name="climatesight-metrics-log").start()
@@ -0,0 +1,365 @@
+import os
+import threading
+import time
+
+import metrics
+from cache import TTLCache, Expiring
+from fetcher import executor, get_json, run_all
+from store import store
+from timeseries import Forecast, current_index
+
+# -----------------------
+# Endpoints
+# -----------------------
+# CLIMATESIGHT_API_BASE points all three APIs at one host serving
+# /v1/forecast, /v1/air-quality and /v1/archive, e.g. the local stand-in
+# in standin.py.
+API_BASE = os.environ.get("CLIMATESIGHT_API_BASE", "").rstrip("/")
+if API_BASE:
+    FORECAST_URL = f"{API_BASE}/v1/forecast"
+    AIR_URL = f"{API_BASE}/v1/air-quality"
+    ARCHIVE_URL = f"{API_BASE}/v1/archive"
+else:
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+    AIR_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+    ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+
+# -----------------------
+# Shared cache
+# -----------------------
+# Keys keep the T:/W:/H:/F:/A: scheme on 3-decimal coordinates. Current
+# conditions go stale quickly; forecasts and air quality change hourly.
+TTLS = {"T": 15 * 60, "W": 15 * 60, "H": 15 * 60, "F": 60 * 60, "A": 60 * 60}
+CURRENT_KEYS = ("T", "W", "H")
+cache = TTLCache(maxsize=20000, ttls=TTLS, name="responses")
+
+# How long a stale value is served from memory before we try again when
+# its background refresh did not succeed.
+STALE_TTL = 60
+
+BATCH_SIZE = 25
+
+# -----------------------
+# Stale-while-revalidate loading
+# -----------------------
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _fetch_and_store(keys, fetch_many):
+    # Failed fetches are simply left out, so they never overwrite a good
+    # value in memory or on disk. The store keeps the raw JSON; memory
+    # gets the decoded form.
+    try:
+        fresh = fetch_many(keys)
+    except Exception:
+        fresh = {}
+    store.put_many(fresh)
+    return {key: _decode(key, value) for key, value in fresh.items()}
+
+
+def _claim(keys):
+    # Mark keys as being refreshed; returns the ones nobody else has.
+    with _refreshing_lock:
+        keys = [k for k in keys if k not in _refreshing]
+        _refreshing.update(keys)
+    return keys
+
+
+def _refresh(keys, fetch_many):
+    try:
+        fresh = _fetch_and_store(keys, fetch_many)
+        for key, value in fresh.items():
+            cache.put(key, value)
+        return fresh
+    finally:
+        with _refreshing_lock:
+            _refreshing.difference_update(keys)
+
+
+def _revalidate(keys, fetch_many):
+    keys = _claim(keys)
+    if keys:
+        executor.submit(_refresh, keys, fetch_many)
+
+
+def _decode(key, value):
+    # JSON value -> what the helpers return: (speed, direction) tuples for
+    # wind, columnar Forecasts for forecast and air-quality responses.
+    if key.startswith("W:"):
+        return tuple(value)
+    if key.startswith(("F:", "A:")):
+        return Forecast.from_response(value)
+    return value
+
+
+def _load(keys, fetch_many):
+    # Memory cache first, then the on-disk store, then upstream. A stale
+    # stored value is returned at once and refreshed in the background.
+    stale = []
+
+    def resolve(missing):
+        out, todo = {}, []
+        now = time.time()
+        for key in missing:
+            row = store.get(key)
+            if row is None:
+                todo.append(key)
+                metrics.inc("climatesight_store_requests_total", result="miss")
+                continue
+            value, fetched_at = row
+            age = now - fetched_at
+            if age < cache.ttl_for(key):
+                # only the rest of its TTL: it is as old as when it was fetched
+                out[key] = Expiring(_decode(key, value), cache.ttl_for(key) - age)
+                metrics.inc("climatesight_store_requests_total", result="fresh")
+            else:
+                out[key] = Expiring(_decode(key, value), STALE_TTL)
+                stale.append(key)
+                metrics.inc("climatesight_store_requests_total", result="stale")
+        if todo:
+            out.update(_fetch_and_store(todo, fetch_many))
+        return out
+
+    result = cache.get_many_or_fetch(keys, resolve)
+    if stale:
+        _revalidate(stale, fetch_many)
+    return result
+
+
+def _load_one(key, fetch, default):
+    return _load([key], lambda keys: {key: fetch()}).get(key, default)
+
+# -----------------------
+# Open-Meteo API Helpers
+# -----------------------
+# With timezone=auto the hourly block starts at local midnight, so the
+# current conditions are the row for the location's current hour, not
+# the first one.
+def _current_rows(items):
+    return current_index([item["hourly"]["time"][0] for item in items],
+                         [item.get("utc_offset_seconds", 0) for item in items])
+
+
+def _at(values, row):
+    if row < 0:
+        raise IndexError(row)
+    return values[row]
+
+
+def _fetch_temp(lat, lon):
+    resp = get_json(
+        FORECAST_URL,
+        params={"latitude": lat, "longitude": lon,
+                "hourly": "temperature_2m", "timezone": "auto"},
+        timeout=8)
+    row = _current_rows([resp])[0]
+    return _at(resp["hourly"]["temperature_2m"], row)
+
+
+def _fetch_wind(lat, lon):
+    resp = get_json(
+        FORECAST_URL,
+        params={"latitude": lat, "longitude": lon,
+                "hourly": "windspeed_10m,winddirection_10m",
+                "timezone": "auto"},
+        timeout=8)
+    row = _current_rows([resp])[0]
+    ws = _at(resp["hourly"]["windspeed_10m"], row)
+    wd = _at(resp["hourly"]["winddirection_10m"], row)
+    return ws, wd
+
+
+def _fetch_forecast(lat, lon):
+    return get_json(
+        FORECAST_URL,
+        params={
+            "latitude": lat, "longitude": lon,
+            "hourly":
+                "temperature_2m,relativehumidity_2m,windspeed_10m,winddirection_10m",
+            "daily":
+                "temperature_2m_max,temperature_2m_min,precipitation_sum",
+            "timezone": "auto"
+        },
+        timeout=10)
+
+
+def _fetch_air(lat, lon):
+    return get_json(
+        AIR_URL,
+        params={"latitude": lat, "longitude": lon,
+                "hourly": "pm10,pm2_5,us_aqi"},
+        timeout=10)
+
+
+@metrics.timed("get_temp")
+def get_temp(lat, lon):
+    return _load_one(f"T:{lat:.3f}:{lon:.3f}",
+                     lambda: _fetch_temp(lat, lon), None)
+
+
+@metrics.timed("get_wind")
+def get_wind(lat, lon):
+    return _load_one(f"W:{lat:.3f}:{lon:.3f}",
+                     lambda: _fetch_wind(lat, lon), (None, None))
+
+
+@metrics.timed("get_forecast")
+def get_forecast(lat, lon):
+    return _load_one(f"F:{lat:.3f}:{lon:.3f}",
+                     lambda: _fetch_forecast(lat, lon), None)
+
+
+@metrics.timed("get_air")
+def get_air(lat, lon):
+    return _load_one(f"A:{lat:.3f}:{lon:.3f}",
+                     lambda: _fetch_air(lat, lon), None)
+
+
+def _fetch_current_batch(chunk):
+    # Open-Meteo accepts comma-separated coordinate lists and answers with
+    # one result object per location, in request order.
+    resp = get_json(
+        FORECAST_URL,
+        params={"latitude": ",".join(str(lat) for lat, _ in chunk),
+                "longitude": ",".join(str(lon) for _, lon in chunk),
+                "hourly": "temperature_2m,windspeed_10m,winddirection_10m,relativehumidity_2m",
+                "timezone": "auto"},
+        timeout=10)
+    if isinstance(resp, dict):
+        resp = [resp]
+    located = []
+    for coord, item in zip(chunk, resp):
+        try:
+            item["hourly"]["time"][0]
+        except (KeyError, IndexError, TypeError):
+            continue
+        located.append((coord, item))
+    if not located:
+        return {}
+    out = {}
+    rows = _current_rows([item for _, item in located])
+    for ((lat, lon), item), row in zip(located, rows):
+        try:
+            hourly = item["hourly"]
+            temp = _at(hourly["temperature_2m"], row)
+            wind = (_at(hourly["windspeed_10m"], row), _at(hourly["winddirection_10m"], row))
+        except (KeyError, IndexError, TypeError):
+            continue
+        out[f"T:{lat:.3f}:{lon:.3f}"] = temp
+        out[f"W:{lat:.3f}:{lon:.3f}"] = wind
+        try:
+            out[f"H:{lat:.3f}:{lon:.3f}"] = _at(hourly["relativehumidity_2m"], row)
+        except (KeyError, IndexError, TypeError):
+            pass
+    return out
+
+
+def _load_batch(coords, prefixes, fetch_chunk):
+    # Fill the `prefixes` entries for many locations with one request per
+    # chunk. Only locations missing from the cache and the store (and not
+    # already being fetched by another session) are requested.
+    by_key = {}
+    for lat, lon in coords:
+        for p in prefixes:
+            by_key[f"{p}:{lat:.3f}:{lon:.3f}"] = (lat, lon)
+
+    def fetch_many(keys):
+        todo = list(dict.fromkeys(by_key[k] for k in keys))
+        out = {}
+        for i in range(0, len(todo), BATCH_SIZE):
+            try:
+                out.update(fetch_chunk(todo[i:i + BATCH_SIZE]))
+            except Exception:
+                pass
+        return out
+
+    return _load(list(by_key), fetch_many)
+
+
+def _collect(coords, load_batches, deadline):
+    # Fetch the chunks of every load_batch concurrently and return whatever
+    # arrived before the render deadline; locations still in flight are
+    # simply absent.
+    coords = list(coords)
+    chunks = [coords[i:i + BATCH_SIZE] for i in range(0, len(coords), BATCH_SIZE)]
+    tasks = {(j, i): (lambda load=load, chunk=chunk: load(chunk))
+             for j, load in enumerate(load_batches) for i, chunk in enumerate(chunks)}
+    out = {}
+    for res in run_all(tasks, deadline).values():
+        out.update(res)
+    return out
+
+
+@metrics.timed("get_current_batch")
+def get_current_batch(coords):
+    # T:/W:/H: entries for many locations.
+    return _load_batch(coords, CURRENT_KEYS, _fetch_current_batch)
+
+
+@metrics.timed("collect_current")
+def collect_current(coords, deadline=None):
+    # Current conditions for the globe; locations still in flight at the
+    # deadline get drawn grey.
+    return _collect(coords, (get_current_batch,), deadline)
+
+
+def _fetch_air_batch(chunk):
+    resp = get_json(
+        AIR_URL,
+        params={"latitude": ",".join(str(lat) for lat, _ in chunk),
+                "longitude": ",".join(str(lon) for _, lon in chunk),
+                "hourly": "pm10,pm2_5,us_aqi"},
+        timeout=10)
+    if isinstance(resp, dict):
+        resp = [resp]
+    return {f"A:{lat:.3f}:{lon:.3f}": item for (lat, lon), item in zip(chunk, resp)
+            if isinstance(item, dict) and "hourly" in item}
+
+
+@metrics.timed("get_air_batch")
+def get_air_batch(coords):
+    # A: entries (the same responses get_air caches) for many locations.
+    return _load_batch(coords, ("A",), _fetch_air_batch)
+
+
+@metrics.timed("collect_conditions")
+def collect_conditions(coords, deadline=None):
+    # Current conditions and air quality together, under one deadline.
+    return _collect(coords, (get_current_batch, get_air_batch), deadline)
+
+# -----------------------
+# Forced refreshes
+# -----------------------
+# Used by the background prefetcher: fetch upstream now, whatever the
+# cache holds, and publish to memory and disk. Each call is one upstream
+# request; the return value is the number of keys refreshed (0 when the
+# request failed or another thread is already refreshing them).
+def refresh_current(coords):
+    keys = [f"{p}:{lat:.3f}:{lon:.3f}" for lat, lon in coords for p in CURRENT_KEYS]
+    keys = _claim(keys)
+    if not keys:
+        return 0
+    return len(_refresh(keys, lambda keys: _fetch_current_batch(coords)))
+
+
+def refresh_air_batch(coords):
+    keys = _claim([f"A:{lat:.3f}:{lon:.3f}" for lat, lon in coords])
+    if not keys:
+        return 0
+    return len(_refresh(keys, lambda keys: _fetch_air_batch(coords)))
+
+
+def _refresh_one(key, fetch):
+    keys = _claim([key])
+    if not keys:
+        return 0
+    return len(_refresh(keys, lambda keys: {key: fetch()}))
+
+
+def refresh_forecast(lat, lon):
+    return _refresh_one(f"F:{lat:.3f}:{lon:.3f}", lambda: _fetch_forecast(lat, lon))
+
+
+def refresh_air(lat, lon):
+    return _refresh_one(f"A:{lat:.3f}:{lon:.3f}", lambda: _fetch_air(lat, lon))
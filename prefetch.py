@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import Counter
+
+import metrics
+from catalogue import get_catalogue
+from fetcher import TokenBucket, set_lane
+from openmeteo import (BATCH_SIZE, CURRENT_KEYS, cache, refresh_air,
+                       refresh_air_batch, refresh_current, refresh_forecast)
+
+# -----------------------
+# Settings
+# -----------------------
+# A background thread refreshes the globe locations (current conditions
+# and, for the snapshot, air quality), and the detail locations people
+# pick most, shortly before their cache entries expire, so renders find
+# them warm. CLIMATESIGHT_PREFETCH=0 turns it off.
+ENABLED = os.environ.get("CLIMATESIGHT_PREFETCH", "1") not in ("", "0")
+# upstream requests per second the prefetcher may spend, and how many it
+# may send back to back after being idle
+RATE = float(os.environ.get("CLIMATESIGHT_PREFETCH_RATE", "0.2"))
+BURST = int(os.environ.get("CLIMATESIGHT_PREFETCH_BURST", "5"))
+TOP_DETAILS = int(os.environ.get("CLIMATESIGHT_PREFETCH_TOP", "10"))
+
+GROUPS = ("world", "india")
+TICK = 2.0
+# An entry is due once less than LEAD of its TTL is left, plus up to
+# SPREAD more picked per key, so entries fetched together do not all come
+# due in the same tick.
+LEAD = 0.2
+SPREAD = 0.1
+RETRY_AFTER = 60.0
+DECAY_EVERY = 60 * 60
+
+log = logging.getLogger("climatesight.prefetch")
+
+# -----------------------
+# Popular detail locations
+# -----------------------
+_selections = Counter()
+_selections_lock = threading.Lock()
+_decayed_at = time.time()
+
+
+def record_selection(lat, lon):
+    if not ENABLED:
+        return
+    with _selections_lock:
+        _selections[(round(lat, 3), round(lon, 3))] += 1
+
+
+def popular(n):
+    # The n most selected locations; counts halve every DECAY_EVERY so the
+    # list follows what people look at now.
+    global _decayed_at
+    with _selections_lock:
+        if time.time() - _decayed_at > DECAY_EVERY:
+            _decayed_at = time.time()
+            for key in list(_selections):
+                _selections[key] //= 2
+                if not _selections[key]:
+                    del _selections[key]
+        return [coord for coord, _ in _selections.most_common(n)]
+
+# -----------------------
+# Scheduling
+# -----------------------
+def _due_at(key):
+    expires = cache.expires_at(key)
+    if expires is None:
+        return 0.0
+    spread = zlib.crc32(key.encode()) / 2**32
+    return expires - cache.ttl_for(key) * (LEAD + spread * SPREAD)
+
+
+def jobs():
+    # [(kind, keys, refresh)] covering the globe groups and the popular
+    # detail locations; each refresh is one upstream request.
+    cat = get_catalogue()
+    coords = {}
+    for name in GROUPS:
+        group = cat.group(name)
+        for lat, lon in zip(group.lat.tolist(), group.lon.tolist()):
+            coords.setdefault((round(lat, 3), round(lon, 3)), (lat, lon))
+    globe = list(coords.values())
+    top = popular(TOP_DETAILS)
+    for coord in top:
+        coords.setdefault(coord, coord)
+
+    out = []
+    coords = list(coords.values())
+    for i in range(0, len(coords), BATCH_SIZE):
+        chunk = coords[i:i + BATCH_SIZE]
+        keys = [f"{p}:{lat:.3f}:{lon:.3f}" for lat, lon in chunk for p in CURRENT_KEYS]
+        out.append(("current", keys, lambda chunk=chunk: refresh_current(chunk)))
+    # the snapshot shows AQI for every globe location
+    for i in range(0, len(globe), BATCH_SIZE):
+        chunk = globe[i:i + BATCH_SIZE]
+        keys = [f"A:{lat:.3f}:{lon:.3f}" for lat, lon in chunk]
+        out.append(("air", keys, lambda chunk=chunk: refresh_air_batch(chunk)))
+    on_globe = {(round(lat, 3), round(lon, 3)) for lat, lon in globe}
+    for lat, lon in top:
+        out.append(("forecast", [f"F:{lat:.3f}:{lon:.3f}"],
+                    lambda lat=lat, lon=lon: refresh_forecast(lat, lon)))
+        if (lat, lon) not in on_globe:
+            out.append(("air", [f"A:{lat:.3f}:{lon:.3f}"],
+                        lambda lat=lat, lon=lon: refresh_air(lat, lon)))
+    return out
+
+
+class Prefetcher:
+    def __init__(self, rate=RATE, burst=BURST):
+        self.bucket = TokenBucket(rate, burst)
+        self._retry = {}  # first key of a failed job -> time to try again
+
+    def run_once(self):
+        # Refresh due jobs, most overdue first, until the budget runs out.
+        # Whatever is left waits for a later tick.
+        now = time.time()
+        due = []
+        for kind, keys, refresh in jobs():
+            at = max(min(_due_at(k) for k in keys), self._retry.get(keys[0], 0.0))
+            if at <= now:
+                due.append((at, kind, keys[0], refresh))
+        due.sort(key=lambda job: job[0])
+        done = 0
+        for _, kind, first, refresh in due:
+            if not self.bucket.take():
+                break
+            if refresh():
+                self._retry.pop(first, None)
+                outcome = "ok"
+                done += 1
+            else:
+                self._retry[first] = time.time() + RETRY_AFTER
+                outcome = "failed"
+            metrics.inc("climatesight_prefetch_requests_total", kind=kind, outcome=outcome)
+        return done
+
+    def run_forever(self):
+        set_lane("background")
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("prefetch pass failed")
+            time.sleep(TICK)
+
+
+_started = False
+_started_lock = threading.Lock()
+
+
+def start():
+    # Start the prefetch thread. Safe to call on every rerun; only the
+    # first call does work.
+    global _started
+    with _started_lock:
+        if not ENABLED or _started:
+            return
+        _started = True
+    threading.Thread(target=Prefetcher().run_forever, daemon=True,
+                     name="climatesight-prefetch").start()
@@ -0,0 +1,315 @@
+"""Headless snapshot service for the globe data.
+
+Builds one aggregated snapshot of the World and India locations (current
+temperature, wind, arrow colour, US AQI and a short summary for each) per
+refresh interval and serves it as compact JSON over HTTP, gzip-compressed
+when the client accepts it, with ETag / If-None-Match revalidation. Wall
+displays and scripts poll it; the Streamlit page reads the same snapshot,
+in-process or from a running service via CLIMATESIGHT_SNAPSHOT_URL:
+
+    python snapshot.py --port 8600 --interval 300
+    curl --compressed -i http://127.0.0.1:8600/snapshot.json
+    CLIMATESIGHT_SNAPSHOT_URL=http://127.0.0.1:8600/snapshot.json streamlit run app.py
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+
+import metrics
+from catalogue import get_catalogue
+from details import summarize_weather
+from globe import binned_color
+from fetcher import RENDER_DEADLINE
+from openmeteo import collect_conditions
+
+# -----------------------
+# Settings
+# -----------------------
+GROUPS = ("world", "india")
+INTERVAL = float(os.environ.get("CLIMATESIGHT_SNAPSHOT_INTERVAL", "300"))
+SNAPSHOT_URL = os.environ.get("CLIMATESIGHT_SNAPSHOT_URL", "")
+# a snapshot with holes (upstream slow or failing) is rebuilt sooner, and
+# an unreachable snapshot service is retried after this long at first
+RETRY_INTERVAL = 10.0
+
+FIELDS = ("name", "lat", "lon", "temp", "ws", "wd", "color", "aqi", "summary")
+
+log = logging.getLogger("climatesight.snapshot")
+
+# -----------------------
+# Building
+# -----------------------
+def build(groups=GROUPS, deadline=None):
+    # (snapshot dict, complete). Rows follow FIELDS, one per location.
+    # Bounded by the render deadline: the first build runs in a viewer's
+    # script, and locations still in flight are filled by the next one.
+    cat = get_catalogue()
+    members = {g: cat.group(g) for g in groups}
+    coords = list(dict.fromkeys(
+        (lat, lon) for g in members.values()
+        for lat, lon in zip(g.lat.tolist(), g.lon.tolist())))
+    values = collect_conditions(coords, deadline)
+
+    complete = True
+    out = {"version": 1, "generated_at": int(time.time()), "fields": list(FIELDS), "groups": {}}
+    for name, group in members.items():
+        rows = []
+        for loc, lat, lon in zip(group.names, group.lat.tolist(), group.lon.tolist()):
+            key = f"{lat:.3f}:{lon:.3f}"
+            temp = values.get(f"T:{key}")
+            ws, wd = values.get(f"W:{key}", (None, None))
+            hum = values.get(f"H:{key}")
+            aq = values.get(f"A:{key}")
+            aqi = aq.hourly.value("us_aqi", aq.current_hour()) if aq is not None else None
+            if temp is None or wd is None or aqi is None:
+                complete = False
+            rows.append([str(loc), lat, lon, temp, ws, wd, binned_color(ws), aqi,
+                         summarize_weather(temp, hum, ws, aqi)])
+        out["groups"][name] = rows
+    return out, complete
+
+
+class Snapshot:
+    # A built snapshot with its encoded bodies, ready to serve.
+
+    def __init__(self, data, expires):
+        self.data = data
+        self.expires = expires
+        self.body = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+        self.gzipped = gzip.compress(self.body, 6)
+        # over the content only, so an unchanged rebuild keeps its ETag
+        groups = json.dumps(data["groups"], separators=(",", ":"), sort_keys=True).encode()
+        self.etag = '"' + hashlib.sha1(groups).hexdigest()[:20] + '"'
+        self._points = {}
+
+    def points(self, group):
+        # Rows as dicts, the shape the globe builder takes.
+        if group not in self._points:
+            fields = self.data["fields"]
+            self._points[group] = [dict(zip(fields, row)) for row in self.data["groups"][group]]
+        return self._points[group]
+
+# -----------------------
+# Sources
+# -----------------------
+class LocalSource:
+    # Builds snapshots in this process, one at a time. Only the very first
+    # build makes callers wait; after that an expired snapshot is rebuilt
+    # on a background thread and served until the new one is ready.
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self._current = None
+        self._build_lock = threading.Lock()
+
+    def _build(self):
+        data, complete = build()
+        metrics.inc("climatesight_snapshot_builds_total", complete=str(complete).lower())
+        ttl = self.interval if complete else min(self.interval, RETRY_INTERVAL)
+        self._current = Snapshot(data, time.time() + ttl)
+        return self._current
+
+    def _rebuild(self, previous):
+        try:
+            self._build()
+        except Exception:
+            log.exception("snapshot rebuild failed")
+            previous.expires = time.time() + RETRY_INTERVAL
+        finally:
+            self._build_lock.release()
+
+    def get(self):
+        snap = self._current
+        if snap is not None and time.time() < snap.expires:
+            return snap
+        if snap is not None:
+            if self._build_lock.acquire(blocking=False):
+                threading.Thread(target=self._rebuild, args=(snap,), daemon=True).start()
+            return snap
+        with self._build_lock:
+            return self._current or self._build()
+
+    def reset(self):
+        self._current = None
+
+    def refresh_forever(self):
+        # Keep a snapshot ready for the HTTP endpoint.
+        while True:
+            try:
+                with self._build_lock:
+                    snap = self._build()
+                time.sleep(max(1.0, snap.expires - time.time()))
+            except Exception:
+                log.exception("snapshot build failed")
+                time.sleep(RETRY_INTERVAL)
+
+
+class RemoteSource:
+    # Reads snapshots from a running snapshot service, revalidating with
+    # If-None-Match once the previous one's max-age is up. While the
+    # service is unreachable the previous snapshot is kept, and retries
+    # back off; until one has ever arrived, snapshots are built locally.
+
+    def __init__(self, url):
+        self.url = url
+        self._current = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._fallback = LocalSource()
+        self._lock = threading.Lock()
+
+    def _fetch(self, snap):
+        headers = {"If-None-Match": snap.etag} if snap is not None else {}
+        resp = requests.get(self.url, headers=headers, timeout=RENDER_DEADLINE)
+        max_age = resp.headers.get("Cache-Control", "").partition("max-age=")[2]
+        expires = time.time() + (float(max_age) if max_age.isdigit() else RETRY_INTERVAL)
+        if resp.status_code == 304 and snap is not None:
+            snap.expires = expires
+            return snap
+        resp.raise_for_status()
+        return Snapshot(resp.json(), expires)
+
+    def get(self):
+        with self._lock:
+            snap = self._current
+            now = time.time()
+            if snap is not None and now < snap.expires:
+                return snap
+            if now >= self._retry_at:
+                try:
+                    snap = self._current = self._fetch(snap)
+                    self._failures = 0
+                    return snap
+                except (requests.RequestException, ValueError):
+                    self._failures += 1
+                    delay = min(RETRY_INTERVAL * 2 ** (self._failures - 1), INTERVAL)
+                    self._retry_at = now + delay
+                    log.warning("snapshot service unreachable, retrying in %.0fs", delay)
+            if snap is not None:
+                return snap
+        return self._fallback.get()
+
+    def reset(self):
+        with self._lock:
+            self._current = None
+            self._failures = 0
+            self._retry_at = 0.0
+        self._fallback.reset()
+
+
+source = RemoteSource(SNAPSHOT_URL) if SNAPSHOT_URL else LocalSource()
+
+
+def current():
+    return source.get()
+
+
+def points(group):
+    return current().points(group)
+
+
+def reset():
+    source.reset()
+
+# -----------------------
+# HTTP endpoint
+# -----------------------
+def accepts_gzip(header):
+    # Whether an Accept-Encoding value allows gzip: listed (or covered by
+    # "*") with a q-value above zero. "gzip;q=0" is a refusal.
+    quality = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        quality[coding.strip().lower()] = q
+    q = quality.get("gzip", quality.get("x-gzip", quality.get("*", 0.0)))
+    return q > 0
+
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    source = source
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            return self._send(200, b"ok", [("Content-Type", "text/plain")])
+        if path != "/snapshot.json":
+            return self._send(404, b"not found", [("Content-Type", "text/plain")])
+        try:
+            snap = self.source.get()
+        except Exception:
+            return self._send(503, b"snapshot unavailable", [("Content-Type", "text/plain")])
+
+        headers = [("ETag", snap.etag),
+                   ("Cache-Control", f"max-age={max(0, int(snap.expires - time.time()))}"),
+                   ("Vary", "Accept-Encoding")]
+        tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        if snap.etag in tags or "*" in tags:
+            metrics.inc("climatesight_snapshot_requests_total", status="304")
+            return self._send(304, headers=headers)
+        metrics.inc("climatesight_snapshot_requests_total", status="200")
+        headers.append(("Content-Type", "application/json; charset=utf-8"))
+        if accepts_gzip(self.headers.get("Accept-Encoding", "")):
+            return self._send(200, snap.gzipped, headers + [("Content-Encoding", "gzip")])
+        return self._send(200, snap.body, headers)
+
+
+def serve(host="127.0.0.1", port=0, snapshots=None):
+    # Start the endpoint on a background thread; returns (server, base_url).
+    snapshots = snapshots or source
+    handler = type("Handler", (SnapshotHandler,), {"source": snapshots})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--interval", type=float, default=INTERVAL,
+                        help="seconds between snapshot rebuilds")
+    args = parser.parse_args()
+
+    snapshots = LocalSource(args.interval)
+    threading.Thread(target=snapshots.refresh_forever, daemon=True).start()
+    server, url = serve(args.host, args.port, snapshots)
+    print(f"Snapshot service listening on {url}/snapshot.json")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
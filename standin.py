@@ -0,0 +1,428 @@
+"""Local stand-in for the Open-Meteo forecast, air-quality and archive APIs.
+
+Serves /v1/forecast, /v1/air-quality and /v1/archive with the parameters
+the app uses (hourly, daily, comma-separated latitude/longitude lists,
+timezone, forecast_days, start_date/end_date) from synthetic data or
+recorded fixtures (replayed as if recorded today), with optional latency
+and error injection. Point the app at it with
+
+    python standin.py --port 8765 --latency 0.2 --error-rate 0.05
+    CLIMATESIGHT_API_BASE=http://127.0.0.1:8765 streamlit run app.py
+
+Settings can also be changed while running, e.g.
+GET /_standin/config?latency=2&error_rate=0.5, and GET /_standin/stats
+returns request counts.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+
+UPSTREAM = {
+    "forecast": "https://api.open-meteo.com/v1/forecast",
+    "air-quality": "https://air-quality-api.open-meteo.com/v1/air-quality",
+    "archive": "https://archive-api.open-meteo.com/v1/archive",
+}
+DEFAULT_DAYS = {"forecast": 7, "air-quality": 5}
+
+# Every fixture is recorded with all the variables the app asks each
+# endpoint for, whichever request records it first; the globe's batch
+# (hourly only) and get_forecast (hourly and daily) share a fixture.
+RECORD_VARIABLES = {
+    "forecast": {"hourly": "temperature_2m,relativehumidity_2m,windspeed_10m,winddirection_10m",
+                 "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum"},
+    "air-quality": {"hourly": "pm10,pm2_5,us_aqi"},
+    "archive": {"daily": "temperature_2m_mean,temperature_2m_max,"
+                         "temperature_2m_min,precipitation_sum"},
+}
+
+UNITS = {
+    "temperature_2m": "°C", "relativehumidity_2m": "%",
+    "windspeed_10m": "km/h", "winddirection_10m": "°",
+    "precipitation": "mm", "pm10": "μg/m³", "pm2_5": "μg/m³", "us_aqi": "USAQI",
+    "temperature_2m_max": "°C", "temperature_2m_min": "°C",
+    "temperature_2m_mean": "°C", "precipitation_sum": "mm",
+}
+
+# -----------------------
+# Synthetic data
+# -----------------------
+def _noise(*parts):
+    # Deterministic value in [0, 1) for the given key parts.
+    return (zlib.crc32(repr(parts).encode()) & 0xFFFFFF) / float(0x1000000)
+
+
+def _hourly_value(var, lat, lon, t, local_hour):
+    day = 2 * math.pi * (local_hour - 9) / 24
+    n = _noise(var, round(lat, 3), round(lon, 3), t)
+    base_temp = 28 - 0.45 * abs(lat)
+    if var == "temperature_2m":
+        return round(base_temp + 6 * math.sin(day) + 2 * n, 1)
+    if var == "relativehumidity_2m":
+        return int(min(100, max(5, 60 - 25 * math.sin(day) + 20 * n)))
+    if var == "windspeed_10m":
+        return round(abs(8 * math.sin(lat / 9 + lon / 17 + t / 40)) + 3 * n, 1)
+    if var == "winddirection_10m":
+        return int((lon * 3 + lat * 2 + t * 2 + 40 * n) % 360)
+    if var == "precipitation":
+        return round(max(0.0, 4 * n - 3), 1)
+    if var == "pm2_5":
+        return round(5 + 30 * n + 10 * math.cos(lat / 11), 1)
+    if var == "pm10":
+        return round(10 + 45 * n + 15 * math.cos(lat / 11), 1)
+    if var == "us_aqi":
+        return int(20 + 120 * n)
+    return round(10 * n, 2)
+
+
+def _utc_offset(tz, lon):
+    if tz == "auto":
+        return int(round(lon / 15)) * 3600
+    return 0
+
+
+def _archive_value(var, lat, lon, day):
+    # Daily history: a seasonal cycle (flipped south of the equator), a
+    # slow warming trend and day-to-day noise. `day` counts from 1970-01-01.
+    n = _noise(var, round(lat, 3), round(lon, 3), day)
+    season = math.cos(2 * math.pi * (day - 196) / 365.25) * (1 if lat >= 0 else -1)
+    mean = 28 - 0.45 * abs(lat) + 0.2 * abs(lat) / 3 * season + 0.025 * (day / 365.25 - 10)
+    if var == "temperature_2m_mean":
+        return round(mean + 4 * (n - 0.5), 1)
+    if var == "temperature_2m_max":
+        return round(mean + 4 + 4 * (n - 0.5), 1)
+    if var == "temperature_2m_min":
+        return round(mean - 4 + 4 * (n - 0.5), 1)
+    if var == "precipitation_sum":
+        return round(max(0.0, 30 * n - 22) * (1.2 - 0.2 * season), 1)
+    return round(10 * n, 2)
+
+
+def synthetic_archive(lat, lon, params):
+    tz = params.get("timezone", "GMT")
+    offset = _utc_offset(tz, lon)
+    start = datetime.strptime(params["start_date"], "%Y-%m-%d")
+    end = datetime.strptime(params["end_date"], "%Y-%m-%d")
+    first = (start - datetime(1970, 1, 1)).days
+    n_days = (end - start).days + 1
+    out = {
+        "latitude": lat, "longitude": lon, "generationtime_ms": 0.1,
+        "utc_offset_seconds": offset,
+        "timezone": "GMT" if offset == 0 else f"GMT{offset // 3600:+d}",
+        "timezone_abbreviation": "GMT" if offset == 0 else f"{offset // 3600:+03d}",
+        "elevation": 0.0,
+    }
+    daily = [v for v in params.get("daily", "").split(",") if v]
+    if daily:
+        out["daily_units"] = {"time": "iso8601", **{v: UNITS.get(v, "") for v in daily}}
+        out["daily"] = {"time": [(start + timedelta(days=d)).strftime("%Y-%m-%d")
+                                 for d in range(n_days)]}
+        for v in daily:
+            out["daily"][v] = [_archive_value(v, lat, lon, first + d) for d in range(n_days)]
+    return out
+
+
+def synthetic(endpoint, lat, lon, params, now=None):
+    # One location's response, shaped like Open-Meteo's.
+    if endpoint == "archive":
+        return synthetic_archive(lat, lon, params)
+    tz = params.get("timezone", "GMT")
+    offset = _utc_offset(tz, lon)
+    days = int(params.get("forecast_days", DEFAULT_DAYS[endpoint]))
+    now = now or datetime.now(timezone.utc)
+    local_midnight = (now + timedelta(seconds=offset)).replace(
+        hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    # hour number since the epoch, so values are stable across requests
+    epoch_hour = int((local_midnight - datetime(1970, 1, 1)).total_seconds() // 3600)
+
+    out = {
+        "latitude": lat, "longitude": lon, "generationtime_ms": 0.1,
+        "utc_offset_seconds": offset,
+        "timezone": "GMT" if offset == 0 else f"GMT{offset // 3600:+d}",
+        "timezone_abbreviation": "GMT" if offset == 0 else f"{offset // 3600:+03d}",
+        "elevation": 0.0,
+    }
+    hourly = [v for v in params.get("hourly", "").split(",") if v]
+    if hourly:
+        times = [local_midnight + timedelta(hours=h) for h in range(24 * days)]
+        out["hourly_units"] = {"time": "iso8601", **{v: UNITS.get(v, "") for v in hourly}}
+        out["hourly"] = {"time": [t.strftime("%Y-%m-%dT%H:%M") for t in times]}
+        for v in hourly:
+            out["hourly"][v] = [_hourly_value(v, lat, lon, epoch_hour + h, t.hour)
+                                for h, t in enumerate(times)]
+    daily = [v for v in params.get("daily", "").split(",") if v]
+    if daily:
+        dates = [local_midnight + timedelta(days=d) for d in range(days)]
+        out["daily_units"] = {"time": "iso8601", **{v: UNITS.get(v, "") for v in daily}}
+        out["daily"] = {"time": [d.strftime("%Y-%m-%d") for d in dates]}
+        for v in daily:
+            col = []
+            for d in range(days):
+                temps = [_hourly_value("temperature_2m", lat, lon, epoch_hour + 24 * d + h, h)
+                         for h in range(24)]
+                if v == "temperature_2m_max":
+                    col.append(max(temps))
+                elif v == "temperature_2m_min":
+                    col.append(min(temps))
+                elif v == "temperature_2m_mean":
+                    col.append(round(sum(temps) / 24, 1))
+                elif v == "precipitation_sum":
+                    col.append(round(sum(_hourly_value("precipitation", lat, lon,
+                                                       epoch_hour + 24 * d + h, h)
+                                         for h in range(24)), 1))
+                else:
+                    col.append(_hourly_value(v, lat, lon, epoch_hour + 24 * d, 12))
+            out["daily"][v] = col
+    return out
+
+# -----------------------
+# Recorded fixtures
+# -----------------------
+class Fixtures:
+    # Recorded responses stored as <dir>/<endpoint>/<lat>_<lon>.json. With
+    # `record` set, locations without a fixture are fetched from the real
+    # API once and saved. Forecast and air-quality fixtures are replayed
+    # moved forward by whole days so they start on the current local date,
+    # as a live response would.
+
+    def __init__(self, directory, record=False):
+        self.directory = directory
+        self.record = record
+
+    def _path(self, endpoint, lat, lon):
+        return os.path.join(self.directory, endpoint, f"{lat:.3f}_{lon:.3f}.json")
+
+    def get(self, endpoint, lat, lon, params):
+        path = self._path(endpoint, lat, lon)
+        data = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            # an older fixture lacking a requested variable is re-recorded
+            if not self.record or not _missing(data, params):
+                return self._replay(endpoint, _select(data, params))
+        if not self.record:
+            return None
+        query = dict(params, latitude=lat, longitude=lon)
+        for block in ("hourly", "daily"):
+            names = [*RECORD_VARIABLES.get(endpoint, {}).get(block, "").split(","),
+                     *params.get(block, "").split(","),
+                     *(k for k in (data or {}).get(block, {}) if k != "time")]
+            names = ",".join(dict.fromkeys(n for n in names if n))
+            if names:
+                query[block] = names
+        with urlopen(f"{UPSTREAM[endpoint]}?{urlencode(query)}", timeout=30) as resp:
+            data = json.load(resp)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return self._replay(endpoint, _select(data, params))
+
+    def _replay(self, endpoint, data):
+        if endpoint == "archive":
+            return data
+        return _shift_to_today(data)
+
+
+def _missing(data, params):
+    # True when `data` lacks an hourly or daily variable `params` asks for.
+    for block in ("hourly", "daily"):
+        have = data.get(block, {})
+        if any(v and v not in have for v in params.get(block, "").split(",")):
+            return True
+    return False
+
+
+def _select(data, params):
+    # Trim a recorded response to the requested hourly/daily variables and,
+    # for the archive, to the requested date range.
+    out = dict(data)
+    for block in ("hourly", "daily"):
+        wanted = [v for v in params.get(block, "").split(",") if v]
+        if block in data and wanted:
+            out[block] = {k: v for k, v in data[block].items()
+                          if k == "time" or k in wanted}
+        elif block in out and not wanted:
+            del out[block]
+    if "daily" in out and "start_date" in params and "end_date" in params:
+        keep = [i for i, t in enumerate(out["daily"]["time"])
+                if params["start_date"] <= t[:10] <= params["end_date"]]
+        out["daily"] = {k: [v[i] for i in keep] for k, v in out["daily"].items()}
+    return out
+
+
+def _shift_to_today(data, now=None):
+    # Move the hourly and daily time axes by the whole days between the
+    # response's first date and today at its UTC offset; values are kept.
+    times = (data.get("hourly") or data.get("daily") or {}).get("time")
+    if not times:
+        return data
+    now = now or datetime.now(timezone.utc)
+    today = (now + timedelta(seconds=data.get("utc_offset_seconds", 0))).date()
+    shift = today - datetime.strptime(times[0][:10], "%Y-%m-%d").date()
+    if not shift:
+        return data
+    out = dict(data)
+    for block, fmt in (("hourly", "%Y-%m-%dT%H:%M"), ("daily", "%Y-%m-%d")):
+        if block in out:
+            out[block] = dict(out[block], time=[
+                (datetime.strptime(t, fmt) + shift).strftime(fmt) for t in out[block]["time"]])
+    return out
+
+# -----------------------
+# HTTP server
+# -----------------------
+class Settings:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, hang_rate=0.0,
+                 hang=30.0, seed=0, fixtures=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang = hang
+        self.fixtures = fixtures
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "locations": 0, "errors": 0, "hangs": 0}
+
+    def update(self, values):
+        with self.lock:
+            for key in ("latency", "jitter", "error_rate", "hang_rate", "hang"):
+                if key in values:
+                    setattr(self, key, float(values[key]))
+            if "seed" in values:
+                self.rng.seed(int(values["seed"]))
+
+    def draw(self):
+        # (delay, fault) for one request; fault is None, "error" or "hang"
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            roll = self.rng.random()
+            if roll < self.hang_rate:
+                self.stats["hangs"] += 1
+                return self.hang, "hang"
+            if roll < self.hang_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return delay, "error"
+            return delay, None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings = Settings()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        settings = self.settings
+
+        if url.path == "/_standin/config":
+            settings.update(params)
+            return self._send(200, {k: getattr(settings, k) for k in
+                                    ("latency", "jitter", "error_rate", "hang_rate", "hang")})
+        if url.path == "/_standin/stats":
+            with settings.lock:
+                return self._send(200, dict(settings.stats))
+
+        endpoint = {"/v1/forecast": "forecast",
+                    "/v1/air-quality": "air-quality",
+                    "/v1/archive": "archive"}.get(url.path)
+        if endpoint is None:
+            return self._send(404, {"error": True, "reason": f"Unknown path {url.path}"})
+        try:
+            lats = [float(v) for v in params["latitude"].split(",")]
+            lons = [float(v) for v in params["longitude"].split(",")]
+        except (KeyError, ValueError):
+            return self._send(400, {"error": True, "reason": "Invalid latitude/longitude"})
+        if len(lats) != len(lons):
+            return self._send(400, {"error": True,
+                                    "reason": "Latitude and longitude must have the same number of elements"})
+        if endpoint == "archive" and not ("start_date" in params and "end_date" in params):
+            return self._send(400, {"error": True,
+                                    "reason": "Parameter 'start_date' and 'end_date' are required"})
+        # per-location timezones, as Open-Meteo allows
+        zones = params.get("timezone", "GMT").split(",")
+        zones = zones * len(lats) if len(zones) == 1 else zones
+
+        delay, fault = settings.draw()
+        time.sleep(delay)
+        if fault == "hang":
+            # drop the connection without answering, like a stalled upstream
+            self.close_connection = True
+            return
+        if fault == "error":
+            return self._send(500, {"error": True, "reason": "Injected failure"})
+
+        results = []
+        for lat, lon, tz in zip(lats, lons, zones):
+            p = dict(params, timezone=tz)
+            data = None
+            if settings.fixtures is not None:
+                data = settings.fixtures.get(endpoint, lat, lon, p)
+            results.append(data if data is not None else synthetic(endpoint, lat, lon, p))
+        with settings.lock:
+            settings.stats["locations"] += len(results)
+        self._send(200, results if len(results) > 1 else results[0])
+
+
+def serve(host="127.0.0.1", port=0, **settings):
+    # Start a stand-in on a background thread; returns (server, base_url).
+    handler = type("Handler", (StandInHandler,), {"settings": Settings(**settings)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="uniform +/- seconds around --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0,
+                        help="fraction of requests that stall for --hang seconds")
+    parser.add_argument("--hang", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", help="directory of recorded responses")
+    parser.add_argument("--record", action="store_true",
+                        help="fetch and save missing fixtures from the real API")
+    args = parser.parse_args()
+
+    fixtures = Fixtures(args.fixtures, args.record) if args.fixtures else None
+    server, url = serve(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, hang_rate=args.hang_rate,
+                        hang=args.hang, seed=args.seed, fixtures=fixtures)
+    print(f"Open-Meteo stand-in listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
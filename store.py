@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# -----------------------
+# Persistent response store
+# -----------------------
+# Last good API responses, kept on disk so a restart or redeploy does not
+# start from a cold cache. One row per cache key (T:/W:/F:/A:...), holding
+# the JSON value and the time it was fetched.
+
+STORE_PATH = os.environ.get("CLIMATESIGHT_STORE_PATH", ".cache/climatesight.sqlite3")
+
+
+class ResponseStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                         "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                         "fetched_at REAL NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        # (value, fetched_at) or None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, fetched_at FROM responses WHERE key = ?",
+                (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put_many(self, values, fetched_at=None):
+        if not values:
+            return
+        if fetched_at is None:
+            fetched_at = time.time()
+        rows = [(k, json.dumps(v, separators=(",", ":")), fetched_at)
+                for k, v in values.items()]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", rows)
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+
+store = ResponseStore(STORE_PATH)
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+import archive
+import standin
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server, url = standin.serve()
+    monkeypatch.setattr(archive, "ARCHIVE_URL", f"{url}/v1/archive")
+    yield server
+    server.shutdown()
+
+
+def _requests(server):
+    return server.RequestHandlerClass.settings.stats["requests"]
+
+
+def test_sync_writes_year_partitions(upstream, tmp_path):
+    assert archive.sync(48.857, 2.352, first=2000, last=2012, root=tmp_path) == 2
+    for year in range(2000, 2013):
+        assert os.path.exists(archive._year_path(48.857, 2.352, year, tmp_path))
+    assert _requests(upstream) == 2
+
+    # stored years are not fetched again; a gap is fetched on its own
+    os.remove(archive._year_path(48.857, 2.352, 2005, tmp_path))
+    assert archive.sync(48.857, 2.352, first=2000, last=2012, root=tmp_path) == 1
+    assert archive.sync(48.857, 2.352, first=2000, last=2012, root=tmp_path) == 0
+    assert _requests(upstream) == 3
+
+
+def test_load_yearly_and_trend_read_partitions_back(upstream, tmp_path):
+    archive.sync(-33.869, 151.209, first=1990, last=2009, root=tmp_path)
+    hist = archive.load(-33.869, 151.209, ("temperature_2m_mean", "precipitation_sum"),
+                        first=1990, last=2009, root=tmp_path)
+    assert len(hist) == (np.datetime64("2010-01-01") - np.datetime64("1990-01-01")).astype(int)
+    assert set(hist.columns) == {"temperature_2m_mean", "precipitation_sum"}
+    assert hist.time[0] == np.datetime64("1990-01-01")
+    assert hist.time[-1] == np.datetime64("2009-12-31")
+
+    years, temps = archive.yearly(hist, "temperature_2m_mean")
+    assert years.tolist() == list(range(1990, 2010))
+    assert np.isfinite(temps).all()
+    _, precip = archive.yearly(hist, "precipitation_sum", "sum")
+    assert precip[0] == pytest.approx(np.nansum(hist["precipitation_sum"][:365]), rel=1e-5)
+
+    # the stand-in warms by 0.25 °C per decade plus noise
+    assert archive.trend(years, temps) == pytest.approx(0.25, abs=0.15)
+
+
+def test_load_without_partitions_is_empty(tmp_path):
+    hist = archive.load(0.0, 0.0, ("temperature_2m_mean",), first=2000, last=2001, root=tmp_path)
+    assert len(hist) == 0
+    assert archive.trend(*archive.yearly(hist, "temperature_2m_mean")) is None
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from cache import MISSING, Expiring, TTLCache
+
+
+def test_cached_keys_are_not_fetched_again():
+    cache = TTLCache(ttls={"T": 60})
+    calls = []
+
+    def fetch_many(keys):
+        calls.append(keys)
+        return {k: k.upper() for k in keys}
+
+    assert cache.get_many_or_fetch(["T:1", "T:2"], fetch_many) == {"T:1": "T:1", "T:2": "T:2"}
+    assert cache.get_many_or_fetch(["T:2", "T:3"], fetch_many) == {"T:2": "T:2", "T:3": "T:3"}
+    assert calls == [["T:1", "T:2"], ["T:3"]]
+
+
+def test_keys_left_out_by_fetch_are_missing_and_not_cached():
+    cache = TTLCache()
+    assert cache.get_many_or_fetch(["A:1", "A:2"], lambda keys: {"A:1": 1}) == {"A:1": 1}
+    assert cache.get_many_or_fetch(["A:2"], lambda keys: {"A:2": 2}) == {"A:2": 2}
+
+
+def test_expiring_value_gets_its_own_ttl():
+    cache = TTLCache(default_ttl=3600)
+    cache.get_many_or_fetch(["F:1"], lambda keys: {"F:1": Expiring("stale", 0)})
+    assert cache.get_many_or_fetch(["F:1"], lambda keys: {"F:1": "fresh"}) == {"F:1": "fresh"}
+
+
+def _concurrent(cache, fetch_many):
+    # Start one caller that blocks inside fetch_many, then a second asking
+    # for an overlapping key; returns both outcomes.
+    outcomes = {}
+
+    def call(name, keys):
+        try:
+            outcomes[name] = cache.get_many_or_fetch(keys, fetch_many)
+        except Exception as exc:
+            outcomes[name] = exc
+
+    first = threading.Thread(target=call, args=("first", ["T:1", "T:2"]))
+    first.start()
+    fetch_many.started.wait(5)
+    second = threading.Thread(target=call, args=("second", ["T:2", "T:3"]))
+    second.start()
+    # let the second caller reach the in-flight key before releasing
+    fetch_many.second_waiting.wait(5)
+    fetch_many.release.set()
+    first.join(5)
+    second.join(5)
+    return outcomes
+
+
+class BlockingFetch:
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.second_waiting = threading.Event()
+
+    def __call__(self, keys):
+        self.calls.append(list(keys))
+        if len(self.calls) == 1:
+            self.started.set()
+            self.release.wait(5)
+            if self.error is not None:
+                raise self.error
+        else:
+            self.second_waiting.set()
+        return {k: k.lower() for k in keys}
+
+
+def test_in_flight_keys_are_coalesced():
+    cache = TTLCache()
+    fetch = BlockingFetch()
+    outcomes = _concurrent(cache, fetch)
+    assert fetch.calls == [["T:1", "T:2"], ["T:3"]]
+    assert outcomes["first"] == {"T:1": "t:1", "T:2": "t:2"}
+    assert outcomes["second"] == {"T:2": "t:2", "T:3": "t:3"}
+
+
+def test_fetch_error_reaches_owner_and_waiters():
+    cache = TTLCache()
+    error = RuntimeError("upstream down")
+    fetch = BlockingFetch(error)
+    outcomes = _concurrent(cache, fetch)
+    assert outcomes["first"] is error
+    assert outcomes["second"] is error
+
+    # nothing is left pending or cached, so the next call fetches again
+    assert cache.get_many_or_fetch(["T:1"], lambda keys: {"T:1": 1}) == {"T:1": 1}
+
+
+def test_get_or_fetch_raises_fetch_error():
+    def fetch():
+        raise ValueError("bad response")
+
+    cache = TTLCache()
+    with pytest.raises(ValueError):
+        cache.get_or_fetch("T:1", fetch)
+    assert cache.get("T:1") is MISSING
+    assert cache.get_or_fetch("T:1", lambda: 1) == 1
@@ -0,0 +1,45 @@
+import math
+
+import numpy as np
+import pytest
+
+from catalogue import GridIndex, _angular_distance
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(7)
+    # uniform on the sphere, plus a few at the poles and the antimeridian
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, 3000)))
+    lon = rng.uniform(-180, 180, 3000)
+    lat = np.concatenate([lat, [90, -90, 0, 0, 45]])
+    lon = np.concatenate([lon, [0, 0, 180, -180, 179.99]])
+    return lat, lon
+
+
+QUERIES = [(0, 0, 10), (48.9, 2.4, 5), (-33.9, 151.2, 30), (89.5, 10, 3),
+           (-80, -170, 20), (10, 179.5, 8), (0, -180, 90), (30, 60, 0.5)]
+
+
+@pytest.mark.parametrize("lat, lon, radius_deg", QUERIES)
+def test_within_matches_brute_force(points, lat, lon, radius_deg):
+    index = GridIndex(*points)
+    radius = math.radians(radius_deg)
+    expected = np.nonzero(_angular_distance(index.xyz, lat, lon) <= radius)[0]
+    assert sorted(index.within(lat, lon, radius).tolist()) == expected.tolist()
+
+
+@pytest.mark.parametrize("lat, lon, _", QUERIES)
+@pytest.mark.parametrize("n", [1, 12, 400])
+def test_nearest_matches_brute_force(points, lat, lon, _, n):
+    index = GridIndex(*points)
+    dist = _angular_distance(index.xyz, lat, lon)
+    found = index.nearest(lat, lon, n)
+    assert len(found) == n
+    assert np.allclose(dist[found], np.sort(dist)[:n])
+
+
+def test_nearest_caps_at_the_number_of_points():
+    index = GridIndex([10.0, -10.0], [20.0, -20.0])
+    assert index.nearest(0, 0, 5).tolist() in ([0, 1], [1, 0])
+    assert len(GridIndex([], []).nearest(0, 0, 3)) == 0
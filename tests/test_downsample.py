@@ -0,0 +1,38 @@
+import numpy as np
+
+from downsample import lttb
+
+
+def test_lttb_keeps_endpoints_and_count():
+    x = np.arange(1000)
+    y = np.sin(x / 30.0) + (x == 517) * 5
+    xs, ys = lttb(x, y, 50)
+    assert len(xs) == len(ys) == 50
+    assert (xs[0], xs[-1]) == (0, 999)
+    assert np.all(np.diff(xs) > 0)
+    assert 517 in xs  # the spike survives
+
+
+def test_lttb_on_datetimes():
+    x = np.arange("2026-01-01T00", "2026-03-01T00", dtype="datetime64[h]")
+    y = np.cos(np.arange(len(x)) / 24.0)
+    xs, ys = lttb(x, y, 100)
+    assert len(xs) == 100
+    assert xs.dtype == x.dtype
+    assert (xs[0], xs[-1]) == (x[0], x[-1])
+
+
+def test_lttb_leaves_short_series_alone():
+    x, y = np.arange(10), np.arange(10.0)
+    xs, ys = lttb(x, y, 10)
+    assert xs.tolist() == x.tolist() and ys.tolist() == y.tolist()
+    assert len(lttb(x, y, 2)[0]) == 10
+
+
+def test_lttb_drops_missing_points():
+    x = np.arange(6)
+    y = np.array([1.0, np.nan, 3.0, None, 5.0, 6.0], dtype=float)
+    xs, ys = lttb(x, y, 10)
+    assert xs.tolist() == [0, 2, 4, 5]
+    xs, ys = lttb(np.arange(300), np.where(np.arange(300) % 7, 1.0, np.nan), 20)
+    assert len(xs) == 20 and np.isfinite(ys).all()
@@ -0,0 +1,73 @@
+import time
+
+from fetcher import CircuitBreaker, TokenBucket
+
+
+def test_token_bucket_spends_burst_then_refuses():
+    bucket = TokenBucket(rate=0, burst=2)
+    assert bucket.take()
+    assert bucket.take()
+    assert not bucket.take()
+    assert not bucket.acquire(True, 0)
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=50, burst=1)
+    assert bucket.take()
+    assert not bucket.take()
+    assert bucket.acquire(True, 1.0)
+
+
+def test_token_bucket_keeps_reserve_for_interactive():
+    bucket = TokenBucket(rate=0, burst=3, reserve=2)
+    assert bucket.acquire(False, 0)
+    assert not bucket.acquire(False, 0)
+    assert bucket.acquire(True, 0)
+    assert bucket.acquire(True, 0)
+    assert not bucket.acquire(True, 0)
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker("/test", threshold=3, cooldown=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.opened_at is not None
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker("/test", threshold=2, cooldown=60)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.allow()
+
+
+def test_breaker_lets_one_probe_through_after_cooldown():
+    breaker = CircuitBreaker("/test", threshold=1, cooldown=0.05)
+    breaker.failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+
+    # a failed probe opens it again for another cooldown
+    breaker.failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.opened_at is None
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_breaker_release_frees_the_probe():
+    breaker = CircuitBreaker("/test", threshold=1, cooldown=0)
+    breaker.failure()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pytest
+
+from geometry import EARTH_RADIUS_KM, arrow_frames, arrow_paths, destination_points
+
+
+def _reference(lat, lon, bearing_deg, distance_km):
+    # Scalar great-circle destination, written out independently.
+    br, la, lo = math.radians(bearing_deg), math.radians(lat), math.radians(lon)
+    d = distance_km / EARTH_RADIUS_KM
+    la2 = math.asin(math.sin(la) * math.cos(d) + math.cos(la) * math.sin(d) * math.cos(br))
+    lo2 = lo + math.atan2(math.sin(br) * math.sin(d) * math.cos(la),
+                          math.cos(d) - math.sin(la) * math.sin(la2))
+    return math.degrees(la2), (math.degrees(lo2) + 540) % 360 - 180
+
+
+QUARTER = EARTH_RADIUS_KM * math.pi / 2
+
+
+@pytest.mark.parametrize("start, bearing, km, end", [
+    ((0, 0), 90, QUARTER, (0, 90)),
+    ((0, 0), 0, QUARTER, (90, None)),
+    ((0, 30), 180, QUARTER / 3, (-30, 30)),
+    ((0, 179), 90, EARTH_RADIUS_KM * math.radians(2), (0, -179)),
+    ((0, -179.5), 270, EARTH_RADIUS_KM * math.radians(1), (0, 179.5)),
+])
+def test_destination_points_known_values(start, bearing, km, end):
+    lat, lon = destination_points(*start, bearing, km)
+    assert float(lat) == pytest.approx(end[0], abs=1e-9)
+    if end[1] is not None:
+        assert float(lon) == pytest.approx(end[1], abs=1e-9)
+
+
+def test_arrow_frames_match_scalar_reference():
+    lats = [51.5, -33.9, 10.0, 0.0, 89.0]
+    lons = [-0.1, 151.2, 179.9, -179.95, 45.0]
+    bearings = [0.0, 135.0, 90.0, 270.0, 200.0]
+    n, osc, main, head = 4, 12, 500, 150
+    geom = arrow_frames(lats, lons, bearings, n, osc, main, head)
+    assert geom["tip"][0].shape == (n, len(lats))
+    for i in range(n):
+        for k in range(len(lats)):
+            b = bearings[k] + osc * math.sin(2 * math.pi * i / n + k * 0.3)
+            tip = _reference(lats[k], lons[k], b, main)
+            left = _reference(*tip, b + 150, head)
+            right = _reference(*tip, b - 150, head)
+            for name, want in (("tip", tip), ("left", left), ("right", right)):
+                got = (geom[name][0][i, k], geom[name][1][i, k])
+                assert got == pytest.approx(want, abs=1e-9)
+                assert -180 <= got[1] < 180
+
+
+def test_arrows_cross_the_antimeridian():
+    geom = arrow_frames([10.0], [179.9], [90.0], 1, 0, 500, 150)
+    tip_lat, tip_lon = geom["tip"][0][0, 0], geom["tip"][1][0, 0]
+    assert -176 < tip_lon < -175
+    assert tip_lat == pytest.approx(_reference(10.0, 179.9, 90.0, 500)[0], abs=1e-9)
+
+
+def test_arrow_paths_packs_seven_slots_per_arrow():
+    lats, lons = np.array([1.0, 2.0]), np.array([10.0, 20.0])
+    tip = (np.array([1.5, 2.5]), np.array([10.5, 20.5]))
+    left = (np.array([1.4, 2.4]), np.array([10.4, 20.4]))
+    right = (np.array([1.6, 2.6]), np.array([10.6, 20.6]))
+    lat, lon = arrow_paths(lats, lons, tip, left, right)
+    assert lat == [1.0, 1.5, None, 1.4, 1.5, 1.6, None,
+                   2.0, 2.5, None, 2.4, 2.5, 2.6, None]
+    assert lon == [10.0, 10.5, None, 10.4, 10.5, 10.6, None,
+                   20.0, 20.5, None, 20.4, 20.5, 20.6, None]
+    assert all(type(v) is float for v in lat if v is not None)
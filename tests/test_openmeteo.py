@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+import openmeteo
+import standin
+from cache import MISSING, TTLCache
+from store import ResponseStore
+
+
+class InlineExecutor:
+    # runs background revalidation before returning, so tests can see it
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    store = ResponseStore(str(tmp_path / "responses.sqlite3"))
+    cache = TTLCache(ttls=openmeteo.TTLS)
+    monkeypatch.setattr(openmeteo, "store", store)
+    monkeypatch.setattr(openmeteo, "cache", cache)
+    monkeypatch.setattr(openmeteo, "executor", InlineExecutor())
+    return store, cache
+
+
+def _failing(calls):
+    def fetch_many(keys):
+        calls.append(list(keys))
+        raise ConnectionError("upstream down")
+    return fetch_many
+
+
+def test_stale_row_is_served_then_revalidated(loader):
+    store, cache = loader
+    store.put_many({"T:1.000:2.000": 10.5}, fetched_at=time.time() - 3600)
+    calls = []
+
+    def fetch_many(keys):
+        calls.append(list(keys))
+        return {k: 12.0 for k in keys}
+
+    assert openmeteo._load(["T:1.000:2.000"], fetch_many) == {"T:1.000:2.000": 10.5}
+    assert calls == [["T:1.000:2.000"]]
+    assert cache.get("T:1.000:2.000") == 12.0
+    value, fetched_at = store.get("T:1.000:2.000")
+    assert value == 12.0 and fetched_at > time.time() - 60
+
+
+def test_stale_row_survives_a_failed_revalidation(loader):
+    store, cache = loader
+    store.put_many({"T:1.000:2.000": 10.5}, fetched_at=time.time() - 3600)
+    calls = []
+
+    assert openmeteo._load(["T:1.000:2.000"], _failing(calls)) == {"T:1.000:2.000": 10.5}
+    assert calls == [["T:1.000:2.000"]]
+    # kept in memory for STALE_TTL, and the stored row is left alone
+    assert cache.get("T:1.000:2.000") == 10.5
+    assert cache.expires_at("T:1.000:2.000") == pytest.approx(
+        time.time() + openmeteo.STALE_TTL, abs=5)
+    assert store.get("T:1.000:2.000")[1] < time.time() - 3000
+
+
+def test_fresh_row_gets_only_the_rest_of_its_ttl(loader):
+    store, cache = loader
+    store.put_many({"W:1.000:2.000": [3.5, 270]}, fetched_at=time.time() - 600)
+    calls = []
+
+    assert openmeteo._load(["W:1.000:2.000"], _failing(calls)) == {"W:1.000:2.000": (3.5, 270)}
+    assert calls == []
+    assert cache.expires_at("W:1.000:2.000") == pytest.approx(
+        time.time() + openmeteo.TTLS["W"] - 600, abs=5)
+
+
+def test_miss_and_failure_returns_default_and_caches_nothing(loader):
+    store, cache = loader
+    calls = []
+    fetch_many = _failing(calls)
+
+    assert openmeteo._load_one("F:1.000:2.000", lambda: fetch_many(["F:1.000:2.000"]),
+                               "default") == "default"
+    assert cache.get("F:1.000:2.000") is MISSING
+    assert store.get("F:1.000:2.000") is None
+    # the next call asks upstream again
+    openmeteo._load(["F:1.000:2.000"], fetch_many)
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server, url = standin.serve()
+    monkeypatch.setattr(openmeteo, "FORECAST_URL", f"{url}/v1/forecast")
+    yield server
+    server.shutdown()
+
+
+def _expected(lat, lon):
+    # the stand-in's values at the location's current local hour
+    resp = standin.synthetic("forecast", lat, lon, {
+        "hourly": "temperature_2m,windspeed_10m,winddirection_10m,relativehumidity_2m",
+        "timezone": "auto"})
+    row = openmeteo._current_rows([resp])[0]
+    hourly = resp["hourly"]
+    return (hourly["temperature_2m"][row],
+            (hourly["windspeed_10m"][row], hourly["winddirection_10m"][row]),
+            hourly["relativehumidity_2m"][row])
+
+
+def test_current_batch_maps_each_location(upstream):
+    chunk = [(48.857, 2.352), (-33.869, 151.209), (40.713, -74.006)]
+    out = openmeteo._fetch_current_batch(chunk)
+    assert len(out) == 9
+    for lat, lon in chunk:
+        key = f"{lat:.3f}:{lon:.3f}"
+        temp, wind, hum = _expected(lat, lon)
+        assert out[f"T:{key}"] == temp
+        assert out[f"W:{key}"] == wind
+        assert out[f"H:{key}"] == hum
+
+
+def test_current_batch_accepts_a_single_result_object(upstream):
+    out = openmeteo._fetch_current_batch([(35.676, 139.650)])
+    temp, wind, hum = _expected(35.676, 139.650)
+    assert out == {"T:35.676:139.650": temp, "W:35.676:139.650": wind,
+                   "H:35.676:139.650": hum}
+
+
+def test_current_batch_skips_malformed_items(monkeypatch):
+    good = standin.synthetic("forecast", 1.0, 2.0, {
+        "hourly": "temperature_2m,windspeed_10m,winddirection_10m", "timezone": "auto"})
+    monkeypatch.setattr(openmeteo, "get_json",
+                        lambda *args, **kwargs: [{"error": True}, good, None])
+    out = openmeteo._fetch_current_batch([(0.0, 0.0), (1.0, 2.0), (3.0, 4.0)])
+    # no humidity in the response, so no H: entry either
+    assert sorted(out) == ["T:1.000:2.000", "W:1.000:2.000"]
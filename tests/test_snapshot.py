@@ -0,0 +1,112 @@
+import gzip
+import http.client
+import json
+import time
+from urllib.parse import urlparse
+
+import pytest
+
+import snapshot
+
+DATA = {"version": 1, "generated_at": 0, "fields": list(snapshot.FIELDS),
+        "groups": {"world": [["Chile", -35.7, -71.5, 14.2, 3.1, 200, "rgb(0,120,230)", 41,
+                              "Mild."]]}}
+
+
+class StubSource:
+    def __init__(self, snap=None):
+        self.snap = snap
+
+    def get(self):
+        if self.snap is None:
+            raise RuntimeError("no snapshot yet")
+        return self.snap
+
+
+@pytest.fixture(scope="module")
+def service():
+    stub = StubSource()
+    server, url = snapshot.serve(snapshots=stub)
+    yield stub, urlparse(url).netloc
+    server.shutdown()
+
+
+@pytest.fixture
+def endpoint(service):
+    stub, netloc = service
+    stub.snap = snapshot.Snapshot(DATA, time.time() + 120)
+    conn = http.client.HTTPConnection(netloc, timeout=5)
+
+    def get(path="/snapshot.json", **headers):
+        conn.request("GET", path, headers={k.replace("_", "-"): v for k, v in headers.items()})
+        resp = conn.getresponse()
+        return resp, resp.read()
+
+    yield stub, get
+    conn.close()
+
+
+def test_snapshot_body_and_cache_headers(endpoint):
+    stub, get = endpoint
+    resp, body = get()
+    assert resp.status == 200
+    assert json.loads(body) == DATA
+    assert resp.getheader("Content-Type").startswith("application/json")
+    assert resp.getheader("ETag") == stub.snap.etag
+    assert resp.getheader("Vary") == "Accept-Encoding"
+    assert resp.getheader("Content-Encoding") is None
+    max_age = int(resp.getheader("Cache-Control").partition("max-age=")[2])
+    assert 115 <= max_age <= 120
+
+
+def test_matching_etag_gets_304_without_body(endpoint):
+    stub, get = endpoint
+    for tags in (stub.snap.etag, f'"other", {stub.snap.etag}', "*"):
+        resp, body = get(If_None_Match=tags)
+        assert resp.status == 304
+        assert body == b""
+        assert resp.getheader("ETag") == stub.snap.etag
+        assert resp.getheader("Cache-Control").startswith("max-age=")
+
+
+def test_stale_etag_gets_the_body(endpoint):
+    _, get = endpoint
+    resp, body = get(If_None_Match='"0123456789abcdef0123"')
+    assert resp.status == 200
+    assert json.loads(body) == DATA
+
+
+def test_etag_follows_content_only():
+    a = snapshot.Snapshot(DATA, 0)
+    b = snapshot.Snapshot(dict(DATA, generated_at=60), 0)
+    c = snapshot.Snapshot(dict(DATA, groups={"world": []}), 0)
+    assert a.etag == b.etag != c.etag
+
+
+@pytest.mark.parametrize("accept, compressed", [
+    ("gzip", True),
+    ("br, gzip;q=0.8", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("gzip;q=0, *", False),
+    ("*;q=0", False),
+    ("identity", False),
+])
+def test_gzip_follows_accept_encoding(endpoint, accept, compressed):
+    _, get = endpoint
+    resp, body = get(Accept_Encoding=accept)
+    assert resp.status == 200
+    if compressed:
+        assert resp.getheader("Content-Encoding") == "gzip"
+        body = gzip.decompress(body)
+    else:
+        assert resp.getheader("Content-Encoding") is None
+    assert json.loads(body) == DATA
+
+
+def test_unavailable_snapshot_and_other_paths(endpoint):
+    stub, get = endpoint
+    assert get("/healthz")[0].status == 200
+    assert get("/nope")[0].status == 404
+    stub.snap = None
+    assert get()[0].status == 503
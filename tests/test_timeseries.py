@@ -0,0 +1,92 @@
+import calendar
+import time
+
+import numpy as np
+
+from timeseries import Forecast, Series, current_index
+
+
+def _epoch(text):
+    return calendar.timegm(time.strptime(text, "%Y-%m-%dT%H:%M"))
+
+
+def test_from_block_keeps_missing_values_as_nan():
+    s = Series.from_block({"time": ["2026-03-01T00:00", "2026-03-01T01:00"],
+                           "temperature_2m": [1.5, None], "us_aqi": [10, 12]})
+    assert len(s) == 2 and "us_aqi" in s
+    assert s.time.dtype == np.dtype("datetime64[m]")
+    assert np.isnan(s["temperature_2m"][1])
+    assert s.value("temperature_2m", 0) == 1.5
+    assert s.value("temperature_2m", 1) is None
+    assert s.value("us_aqi", 1) == 12
+    assert s.value("us_aqi", 2) is None
+    assert s.value("precipitation", 0) is None
+
+
+def test_window_is_a_view_of_the_columns():
+    s = Series([f"2026-03-01T{h:02d}:00" for h in range(24)],
+               {"temperature_2m": np.arange(24.0)})
+    w = s.window(np.datetime64("2026-03-01T05:00"), np.datetime64("2026-03-01T08:00"))
+    assert w["temperature_2m"].tolist() == [5.0, 6.0, 7.0]
+    assert np.shares_memory(w["temperature_2m"], s["temperature_2m"])
+    assert w.time.dtype == s.time.dtype
+
+
+def test_forecast_from_response():
+    f = Forecast.from_response({"utc_offset_seconds": -18000,
+                                "hourly": {"time": ["2026-03-01T00:00"], "pm10": [3]},
+                                "daily": {"time": ["2026-03-01"], "precipitation_sum": [0.4]}})
+    assert f.utc_offset == -18000
+    assert f.daily.time.dtype == np.dtype("datetime64[D]")
+    assert f.daily.value("precipitation_sum", 0) == 0.4
+    assert len(Forecast.from_response({}).hourly) == 0
+
+
+def test_current_index_uses_each_utc_offset():
+    now = _epoch("2026-03-01T05:30")
+    rows = current_index(["2026-03-01T00:00", "2026-03-01T00:00", "2026-02-28T00:00"],
+                         [0, 3600, -5 * 3600], now)
+    assert rows.tolist() == [5, 6, 24]
+
+
+def test_current_index_is_negative_before_the_start():
+    now = _epoch("2026-03-01T05:30")
+    assert current_index(["2026-03-01T08:00"], [0], now).tolist() == [-3]
+
+
+def test_index_at_even_rows():
+    s = Series(["2026-03-01T00:00", "2026-03-01T01:00", "2026-03-01T02:00"], {})
+    assert s.index_at("2026-02-28T23:59") is None
+    assert s.index_at("2026-03-01T00:00") == 0
+    assert s.index_at("2026-03-01T01:59") == 1
+    assert s.index_at("2026-03-01T02:59") == 2
+    assert s.index_at("2026-03-01T03:00") is None
+
+
+def test_index_at_uneven_rows_accepts_the_last_one():
+    s = Series(["2026-03-01T00:00", "2026-03-01T01:00", "2026-03-01T03:00"], {})
+    assert s.step is None
+    assert s.index_at("2026-03-01T02:59") == 1
+    assert s.index_at("2026-03-01T03:00") == 2
+    assert s.index_at("2026-03-01T04:59") == 2
+    assert s.index_at("2026-03-01T05:00") is None
+
+
+def test_index_at_daily_rows():
+    s = Series(["2026-03-01", "2026-03-02"], {}, "D")
+    assert s.index_at(np.datetime64("2026-03-02")) == 1
+    assert s.index_at(np.datetime64("2026-03-03")) is None
+
+
+def test_forecast_current_hour_and_today():
+    resp = {"utc_offset_seconds": 3600,
+            "hourly": {"time": [f"2026-03-01T{h:02d}:00" for h in range(24)],
+                       "temperature_2m": list(range(24))},
+            "daily": {"time": ["2026-03-01"], "temperature_2m_max": [23]}}
+    f = Forecast.from_response(resp)
+    now = _epoch("2026-03-01T05:30")
+    row = f.current_hour(now)
+    assert f.hourly.value("temperature_2m", row) == 6
+    assert f.today_index(now) == 0
+    assert len(f.next_hours(48, now)) == 18
+    assert f.current_hour(_epoch("2026-03-01T23:30")) is None
@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+
+# -----------------------
+# Columnar forecast data
+# -----------------------
+# Forecast and air-quality responses are parsed once, when they arrive,
+# into one NumPy array per variable on a datetime64 time axis. Times are
+# the location's wall clock, as Open-Meteo reports them, with the UTC
+# offset kept alongside. Windows are slices, so charts and summaries get
+# views into the cached arrays instead of copies.
+#
+# "Now" at a location is UTC now plus its offset. Rows are evenly spaced,
+# so finding the current row is one subtraction and one division against
+# the first timestamp rather than a datetime parse per render.
+
+
+def _column(values):
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        # None marks a missing value; keep those as NaN
+        arr = np.array([np.nan if v is None else v for v in values], dtype=float)
+    return arr
+
+
+def current_index(first_times, utc_offsets, now=None):
+    # Current-hour row for many hourly series at once, given each one's
+    # first timestamp (local wall clock) and UTC offset in seconds. Rows
+    # before the start come out negative.
+    if now is None:
+        now = time.time()
+    first = np.asarray(first_times, dtype="datetime64[m]")
+    offsets = np.asarray(utc_offsets, dtype=np.int64).astype("timedelta64[s]")
+    local_now = np.datetime64(int(now), "s") + offsets
+    return ((local_now - first) // np.timedelta64(1, "h")).astype(int)
+
+
+def _scalar(value):
+    value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class Series:
+    # One block of a response ("hourly" or "daily"): a sorted time axis and
+    # a column per variable, all the same length.
+
+    def __init__(self, time, columns, unit="m"):
+        self.time = np.asarray(time, dtype=f"datetime64[{unit}]")
+        self.columns = columns
+        # spacing of the rows, or None if uneven
+        self.step = np.timedelta64(1, "D" if unit == "D" else "h")
+        if len(self.time) > 1:
+            steps = np.diff(self.time)
+            self.step = steps[0] if np.all(steps == steps[0]) else None
+
+    @classmethod
+    def from_block(cls, block, unit="m"):
+        block = block or {}
+        columns = {name: _column(values) for name, values in block.items()
+                   if name != "time"}
+        return cls(block.get("time", []), columns, unit)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def slice(self, start, stop):
+        return Series(self.time[start:stop],
+                      {k: v[start:stop] for k, v in self.columns.items()},
+                      np.datetime_data(self.time.dtype)[0])
+
+    def window(self, start, end):
+        # Rows with start <= time < end.
+        i, j = np.searchsorted(self.time, [np.datetime64(start), np.datetime64(end)])
+        return self.slice(i, j)
+
+    def index_at(self, t):
+        # Row whose period contains t; None when t falls outside the series.
+        t = np.datetime64(t)
+        if len(self.time) == 0 or t < self.time[0]:
+            return None
+        if self.step is not None:
+            i = int((t - self.time[0]) // self.step)
+            return i if i < len(self.time) else None
+        # uneven rows: the last one lasts as long as the gap before it
+        if t >= self.time[-1] + (self.time[-1] - self.time[-2]):
+            return None
+        return int(np.searchsorted(self.time, t, side="right")) - 1
+
+    def value(self, name, i):
+        # Python scalar at row i, or None when missing.
+        if i is None or name not in self.columns or not 0 <= i < len(self):
+            return None
+        return _scalar(self.columns[name][i])
+
+
+class Forecast:
+    # A parsed forecast or air-quality response for one location.
+
+    def __init__(self, hourly, daily, utc_offset=0):
+        self.hourly = hourly
+        self.daily = daily
+        self.utc_offset = int(utc_offset)
+
+    @classmethod
+    def from_response(cls, resp):
+        return cls(Series.from_block(resp.get("hourly")),
+                   Series.from_block(resp.get("daily"), "D"),
+                   resp.get("utc_offset_seconds", 0))
+
+    def local_now(self, now=None):
+        # Current wall-clock time at the location.
+        if now is None:
+            now = time.time()
+        return np.datetime64(int(now) + self.utc_offset, "s")
+
+    def current_hour(self, now=None):
+        # Row of `hourly` for the current local hour, or None.
+        return self.hourly.index_at(self.local_now(now))
+
+    def next_hours(self, hours, now=None):
+        # `hours` hourly rows starting at the current local hour.
+        start = self.local_now(now).astype("datetime64[h]")
+        return self.hourly.window(start, start + np.timedelta64(hours, "h"))
+
+    def today_index(self, now=None):
+        # Row of `daily` for the local date, or None.
+        return self.daily.index_at(self.local_now(now).astype("datetime64[D]"))
@@ -0,0 +1,79 @@
+"""Fill the on-disk caches before a worker takes traffic.
+
+Compiles the location tables and fetches the World/India current
+conditions and air quality, plus the default selection's forecast, air
+quality and wind, into the persistent store. A worker started afterwards
+reads those from disk on its first render instead of waiting on
+upstream. Memory caches and figures are per process and are not carried
+over; they fill from the store on the first render.
+
+    python warmup.py
+    python warmup.py -- streamlit run app.py     # warm, then become the app
+"""
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# -----------------------
+# Settings
+# -----------------------
+# the page's default selection: first location of the World group
+DEFAULT_GROUP = "world"
+# no viewer is waiting, so let every request finish
+WARM_DEADLINE = 60.0
+
+
+@contextmanager
+def _step(timings, name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - t0, 4)
+
+
+def warm(group=DEFAULT_GROUP, details=True):
+    # Fill the compiled tables and the persistent store; returns seconds
+    # per step.
+    timings = {}
+    with _step(timings, "catalogue"):
+        from catalogue import get_catalogue
+        members = get_catalogue().group(group)
+        lat, lon = float(members.lat[0]), float(members.lon[0])
+
+    with _step(timings, "conditions"):
+        import snapshot
+        snapshot.build(deadline=WARM_DEADLINE)
+
+    if details:
+        from fetcher import run_all
+        from openmeteo import get_air, get_forecast, get_wind
+        with _step(timings, "details"):
+            run_all({"forecast": lambda: get_forecast(lat, lon),
+                     "air": lambda: get_air(lat, lon),
+                     "wind": lambda: get_wind(lat, lon)}, deadline=WARM_DEADLINE)
+    return timings
+
+
+def main():
+    argv = sys.argv[1:]
+    command = []
+    if "--" in argv:
+        argv, command = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-details", dest="details", action="store_false",
+                        help="skip the default selection's forecast and air quality")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    timings = warm(details=args.details)
+    print(f"warm-up {time.perf_counter() - t0:.2f}s  "
+          + "  ".join(f"{k}={v * 1000:.0f}ms" for k, v in timings.items()), flush=True)
+    if command:
+        os.execvp(command[0], command)
+
+
+if __name__ == "__main__":
+    main()
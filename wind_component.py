@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+
+import plotly.io as pio
+import streamlit as st
+import streamlit.components.v1 as components
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+# -----------------------
+# Browser-side wind animation
+# -----------------------
+# The globe figure goes out without animation frames, together with one
+# record per arrow (globe.arrow_spec). A small script in the component
+# moves the arrows with requestAnimationFrame, so frame rate and
+# smoothness cost nothing on the server or on the wire.
+#
+# plotly.js is served by the app itself: the plotly package's bundle is
+# copied into ./static and loaded from Streamlit's static file route
+# (server.enableStaticServing, on in .streamlit/config.toml), so the
+# globe works offline and under a strict CSP. CLIMATESIGHT_PLOTLY_JS can
+# point at another copy instead, e.g. a CDN.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_PATH = os.path.join(ROOT, "components", "wind_globe.html")
+STATIC_DIR = os.path.join(ROOT, "static")
+PLOTLY_JS_NAME = f"plotly-{get_plotlyjs_version()}.min.js"
+PLOTLY_JS = os.environ.get("CLIMATESIGHT_PLOTLY_JS", "")
+
+_install_lock = threading.Lock()
+
+with open(TEMPLATE_PATH, encoding="utf-8") as f:
+    TEMPLATE = f.read()
+
+
+def _script_json(text):
+    # keep location names from closing the <script> block
+    return text.replace("</", "<\\/")
+
+
+def _install_plotly_js():
+    path = os.path.join(STATIC_DIR, PLOTLY_JS_NAME)
+    with _install_lock:
+        if not os.path.exists(path):
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(get_plotlyjs())
+            os.replace(tmp, path)
+
+
+def plotly_js_url():
+    # Where the component loads plotly.js from, or None when there is no
+    # local copy to serve (static serving off or ./static not writable);
+    # the page then keeps to Plotly animation frames.
+    if PLOTLY_JS:
+        return PLOTLY_JS
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    try:
+        _install_plotly_js()
+    except OSError:
+        return None
+    # relative to the page, so a server.baseUrlPath is kept
+    return f"app/static/{PLOTLY_JS_NAME}"
+
+
+def wind_globe_html(spec, arrows, plotly_js):
+    # Streamlit's Plotly template holds placeholder colours that only its
+    # own chart element resolves, so the iframe uses plotly.js defaults.
+    layout = {k: v for k, v in spec["layout"].items() if k != "template"}
+    spec = dict(spec, layout=layout)
+    return (TEMPLATE
+            .replace("__PLOTLY_JS__", plotly_js)
+            .replace("__HEIGHT__", str(spec["layout"].get("height", 720)))
+            .replace("__ARROWS__", json.dumps(arrows, separators=(",", ":")))
+            .replace("__FIGURE__", _script_json(pio.to_json(spec, validate=False))))
+
+
+def wind_globe(fig, arrows, plotly_js):
+    # Render a globe_figure(..., frames=False) result with its arrows.
+    spec = fig.to_dict()
+    html = wind_globe_html(spec, arrows, plotly_js)
+    height = spec["layout"].get("height", 720) + 10
+    # st.iframe supersedes components.html in newer Streamlit releases
+    if hasattr(st, "iframe"):
+        st.iframe(html, height=height)
+    else:
+        components.html(html, height=height)
@@ -0,0 +1,85 @@
+import numpy as np
+
+from geometry import tangent_basis, unit_vectors
+from openmeteo import collect_current
+
+# -----------------------
+# Gridded wind field
+# -----------------------
+# Wind is fetched on a coarse lat/lon grid through the batched current
+# conditions endpoint, then interpolated locally to a denser display
+# lattice. Arrow density therefore costs CPU, not upstream requests.
+
+COARSE_STEP = 15.0
+DISPLAY_STEP = 7.5
+MAX_LAT = 75.0
+
+
+def grid_axes(step, max_lat=MAX_LAT):
+    lats = np.arange(-max_lat, max_lat + step / 2, step)
+    lons = np.arange(-180.0, 180.0, step)
+    return lats, lons
+
+
+class WindField:
+    # Wind on a regular grid, stored as 3-D tangent vectors so neighbouring
+    # cells can be blended without angle wrap-around or pole artefacts.
+    # Missing cells are NaN and make interpolated points that touch them
+    # NaN too.
+
+    def __init__(self, lats, lons, speed, bearing):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        speed = np.asarray(speed, dtype=float)
+        br = np.radians(np.asarray(bearing, dtype=float))
+        east, north = tangent_basis(*np.meshgrid(self.lats, self.lons, indexing="ij"))
+        self.vectors = ((speed * np.sin(br))[..., None] * east +
+                        (speed * np.cos(br))[..., None] * north)
+
+    def interpolate(self, lat, lon):
+        # Bilinear interpolation to arbitrary points, returning (speed,
+        # bearing in degrees). Longitude wraps around the globe and
+        # latitude is clamped to the grid.
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        n_lat, n_lon = len(self.lats), len(self.lons)
+        dlat = self.lats[1] - self.lats[0]
+        dlon = 360.0 / n_lon
+
+        fi = np.clip((lat - self.lats[0]) / dlat, 0, n_lat - 1)
+        i0 = np.minimum(np.floor(fi).astype(int), n_lat - 2)
+        ti = (fi - i0)[..., None]
+        fj = ((lon - self.lons[0]) % 360.0) / dlon
+        j0 = np.floor(fj).astype(int) % n_lon
+        j1 = (j0 + 1) % n_lon
+        tj = (fj - np.floor(fj))[..., None]
+
+        v = self.vectors
+        vec = ((1 - ti) * (1 - tj) * v[i0, j0] + (1 - ti) * tj * v[i0, j1] +
+               ti * (1 - tj) * v[i0 + 1, j0] + ti * tj * v[i0 + 1, j1])
+
+        east, north = tangent_basis(lat, lon)
+        e = np.sum(vec * east, axis=-1)
+        n = np.sum(vec * north, axis=-1)
+        return np.hypot(e, n), np.degrees(np.arctan2(e, n)) % 360
+
+
+def fetch_wind_field(step=COARSE_STEP, deadline=None):
+    lats, lons = grid_axes(step)
+    speed = np.full((len(lats), len(lons)), np.nan)
+    bearing = np.full_like(speed, np.nan)
+    coords = [(float(la), float(lo)) for la in lats for lo in lons]
+    current = collect_current(coords, deadline)
+    for k, (la, lo) in enumerate(coords):
+        ws, wd = current.get(f"W:{la:.3f}:{lo:.3f}", (None, None))
+        if ws is not None and wd is not None:
+            speed.flat[k], bearing.flat[k] = ws, wd
+    return WindField(lats, lons, speed, bearing)
+
+
+def display_lattice(center_lat, center_lon, step=DISPLAY_STEP):
+    # Lattice points on the hemisphere facing (center_lat, center_lon).
+    lats, lons = grid_axes(step)
+    lat, lon = (a.ravel() for a in np.meshgrid(lats, lons, indexing="ij"))
+    facing = unit_vectors(lat, lon) @ unit_vectors(center_lat, center_lon) > 0
+    return lat[facing], lon[facing]